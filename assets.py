@@ -0,0 +1,132 @@
+import numpy as np
+
+
+# Per-asset columns: daily returns end in _d, portfolio weights do not
+RETURN_KINDS = ['RET', 'ER', 'RET_SHORT', 'ER_SHORT']
+WEIGHT_KINDS = ['RP_LONG', 'RP_SHORT', 'IDEAL_SHORT']
+
+# Funding and foreign short rates; returns, but not tradable assets
+RATE_COLUMNS = ['RET_FFR_d', 'RET_FXR_d']
+
+
+class Asset:
+    """
+    One market the strategy trades.
+
+    name is the column stem: RET_<name>_d, ER_SHORT_<name>_d, RP_SHORT_<name>
+    and so on. leverage is the leverage already in its return columns (the
+    short risk parity weight is capped at 1/leverage and charts divide it back
+    out). long marks the assets held by the long risk parity portfolio.
+    """
+
+    def __init__(self, name, label=None, leverage=1, long=False):
+        self.name = name
+        self.label = label or name
+        self.leverage = leverage
+        self.long = long
+
+    def column(self, kind):
+        if kind in WEIGHT_KINDS:
+            return f'{kind}_{self.name}'
+        return f'{kind}_{self.name}_d'
+
+    def __repr__(self):
+        return f"Asset({self.name!r}, leverage={self.leverage}, long={self.long})"
+
+
+class AssetRegistry:
+    """
+    Ordered set of assets; drives column discovery, leverage and hover fields.
+
+    Every per-asset list the builders need (returns to window, weights to
+    average, hover lines) is generated from here in registration order, so
+    adding a market is one register call rather than an edit in every chart.
+    """
+
+    def __init__(self, assets=()):
+        self._assets = {}
+        for asset in assets:
+            self.register(asset)
+
+    def register(self, asset):
+        self._assets[asset.name] = asset
+        return asset
+
+    def __getitem__(self, name):
+        return self._assets[name]
+
+    def __iter__(self):
+        return iter(self._assets.values())
+
+    def __len__(self):
+        return len(self._assets)
+
+    def __contains__(self, name):
+        return name in self._assets
+
+    def names(self, long=None, columns=None, kind='RET'):
+        """
+        Registered asset names, optionally only the long ones and only those
+        whose `kind` column is in columns.
+        """
+        columns = None if columns is None else set(columns)
+        return [
+            asset.name for asset in self
+            if (long is None or asset.long == long) and (columns is None or asset.column(kind) in columns)
+        ]
+
+    def columns(self, kind, names=None):
+        names = self.names() if names is None else names
+        return [self[name].column(kind) for name in names]
+
+    def leverage(self, names=None):
+        names = self.names() if names is None else names
+        return np.array([self[name].leverage for name in names], dtype=float)
+
+    def name_of(self, column):
+        """
+        Asset a (possibly prefixed, e.g. IRR_RET_SPX_d) column belongs to, or None.
+        """
+        for asset in self:
+            for kind in RETURN_KINDS + WEIGHT_KINDS:
+                stem = asset.column(kind)
+                if column == stem or column.endswith(f'_{stem}'):
+                    return asset.name
+        return None
+
+    def discover(self, columns, leverage=1):
+        """
+        Register every asset with both RET_<name>_d and ER_<name>_d in columns
+        that is not registered yet.
+
+        Returns:
+        list: Names of the newly registered assets.
+        """
+        columns = list(columns)
+        present = set(columns)
+        added = []
+        for column in columns:
+            if not (column.startswith('RET_') and column.endswith('_d')) or column in RATE_COLUMNS:
+                continue
+            name = column[len('RET_'):-len('_d')]
+            if name.startswith('SHORT_') or name in self or f'ER_{name}_d' not in present:
+                continue
+            self.register(Asset(name, leverage=leverage))
+            added.append(name)
+        return added
+
+    def block(self, df, kind='RET', names=None):
+        """
+        Frame --> dense (T, assets) float block of one column kind, in registry order
+
+        Returns:
+        np.ndarray: C-contiguous block, one column per asset.
+        """
+        return np.ascontiguousarray(df[self.columns(kind, names)].to_numpy(dtype=float))
+
+
+ASSETS = AssetRegistry([
+    Asset('SPX', 'S&P500', long=True),
+    Asset('10Y', '10Y Treasury', long=True),
+    Asset('DXY', 'US Dollar Index', leverage=5),
+])
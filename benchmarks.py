@@ -0,0 +1,116 @@
+"""
+Benchmarks for the chart builders in custom_plots.
+
+    python benchmarks.py --sizes 10000 100000 1000000 --out benchmarks.json
+
+Each builder runs on simulated datasets of the requested sizes (see
+synthetic_data.generate_market_data). Wall time (best and median of --repeat runs, derived-data caches cleared before each run), peak
+traced memory and serialized figure size are written as JSON, so results from
+two versions can be diffed. Needs neither Streamlit nor network access.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import plotly
+
+import custom_plots
+from irr_cube import clear_derived_caches
+from synthetic_data import generate_market_data
+
+
+def benchmark_dataset(n_rows, seed=0):
+    # Business days from 1970 run out of Timestamp range past ~75k rows, so
+    # larger frames switch to hourly observations
+    freq = 'B' if n_rows <= 75_000 else 'h'
+    return generate_market_data(n_rows, freq=freq, seed=seed)
+
+
+BUILDERS = {
+    'aggregate_daily_returns_to_annualized_returns': lambda df: custom_plots.aggregate_daily_returns_to_annualized_returns(df, 252, 1),
+    'create_decade_scatter_plot': lambda df: custom_plots.create_decade_scatter_plot(df=df),
+    'create_returns_plot': lambda df: custom_plots.create_returns_plot(df, select_col='ER_RP_Portfolio_SHORT', lookback_options=[6, 12, 24]),
+    'plot_rolling_excess_returns': lambda df: custom_plots.plot_rolling_excess_returns(df),
+    'plot_yield_comparison': lambda df: custom_plots.plot_yield_comparison(df),
+    'plot_stock_bond_correlation': lambda df: custom_plots.plot_stock_bond_correlation(df),
+    'plot_portfolio_returns_bubble_year': lambda df: custom_plots.plot_portfolio_returns_bubble_year(df),
+}
+
+
+def _payload_bytes(result):
+    if isinstance(result, pd.DataFrame):
+        return int(result.memory_usage(deep=True).sum())
+    return len(result.to_json())
+
+
+def benchmark_builder(name, df, repeat=3):
+    builder = BUILDERS[name]
+    timings = []
+    for _ in range(repeat):
+        frame = df.copy()
+        clear_derived_caches()
+        start = time.perf_counter()
+        result = builder(frame)
+        timings.append(time.perf_counter() - start)
+
+    # Memory is traced on a separate run since tracing slows the builder down
+    frame = df.copy()
+    clear_derived_caches()
+    tracemalloc.start()
+    builder(frame)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'builder': name,
+        'rows': len(df),
+        'seconds_best': min(timings),
+        'seconds_median': float(np.median(timings)),
+        'peak_memory_mb': peak / 2 ** 20,
+        'payload_bytes': _payload_bytes(result),
+    }
+
+
+def _environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'plotly': plotly.__version__,
+    }
+
+
+def run_benchmarks(sizes=(10_000, 100_000, 1_000_000), builders=None, repeat=3, seed=0):
+    results = []
+    for n_rows in sizes:
+        df = benchmark_dataset(n_rows, seed)
+        for name in builders or BUILDERS:
+            result = benchmark_builder(name, df, repeat)
+            results.append(result)
+            print(f"{name:<48} {n_rows:>9,} rows  {result['seconds_best']:8.3f}s  {result['peak_memory_mb']:8.1f} MB")
+    return {'environment': _environment(), 'results': results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000], help="dataset sizes in rows")
+    parser.add_argument("--builders", nargs="+", choices=list(BUILDERS), help="subset of builders to run")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per builder and size")
+    parser.add_argument("--out", default="benchmarks.json", help="JSON file for the results")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.sizes, args.builders, args.repeat)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=1)
+    print(f"Wrote {len(report['results'])} results to {args.out}")
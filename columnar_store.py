@@ -0,0 +1,208 @@
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+COLUMNAR_DATA_PATH = "./Data/processed_data"
+MANIFEST_FILE = "manifest.json"
+
+
+def _column_file(column):
+    return "".join(char if char.isalnum() or char in "-_" else "_" for char in str(column)) + ".bin"
+
+
+def has_columnar(path=COLUMNAR_DATA_PATH):
+    return os.path.exists(os.path.join(path, MANIFEST_FILE))
+
+
+def write_columnar(df, path=COLUMNAR_DATA_PATH, metadata=None, blocks=None):
+    """
+    DataFrame on a DatetimeIndex --> one raw binary file per column plus a manifest
+
+    Every column must have a numeric, bool or datetime dtype so it can be
+    memory-mapped back without parsing. metadata is stored in the manifest as is.
+    blocks maps a block name to a list of columns that are also written
+    together as one dense row-major (T, k) float64 file, so kernels that work
+    across assets map a single array instead of stacking columns.
+    """
+    if not isinstance(df.index, pd.DatetimeIndex):
+        raise ValueError("Columnar store needs a DatetimeIndex")
+
+    os.makedirs(path, exist_ok=True)
+    manifest = {
+        "rows": len(df),
+        "index": {"name": df.index.name, "file": "index.bin", "dtype": "<M8[ns]"},
+        "columns": {},
+        "blocks": {},
+        **(metadata or {}),
+    }
+    digest = hashlib.blake2b(digest_size=16)
+    index_values = df.index.values.astype("<M8[ns]")
+    digest.update(index_values.tobytes())
+    index_values.tofile(os.path.join(path, "index.bin"))
+
+    for column in df.columns:
+        values = df[column].to_numpy()
+        if values.dtype.kind not in "biufM":
+            raise ValueError(f"Column {column} has unsupported dtype {values.dtype}")
+        values = np.ascontiguousarray(values, dtype=values.dtype.newbyteorder("<"))
+        manifest["columns"][column] = {"file": _column_file(column), "dtype": values.dtype.str}
+        digest.update(repr(column).encode())
+        digest.update(values.tobytes())
+        values.tofile(os.path.join(path, _column_file(column)))
+    manifest["fingerprint"] = digest.hexdigest()
+
+    # Blocks repeat column data, so they are left out of the fingerprint
+    for name, columns in (blocks or {}).items():
+        values = np.ascontiguousarray(df[list(columns)].to_numpy(dtype="<f8"))
+        manifest["blocks"][name] = {"file": _column_file(f"block_{name}"), "dtype": values.dtype.str, "columns": list(columns)}
+        values.tofile(os.path.join(path, manifest["blocks"][name]["file"]))
+
+    # Manifest is written last so a half-written store is never picked up
+    _write_manifest(path, manifest)
+    return manifest
+
+
+def atomic_write(path, data):
+    """
+    Write data (str or bytes) to a temporary file and rename it over path, so
+    readers see either the old file or the new one, never a partial write.
+    """
+    temp_file = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_file, "wb" if isinstance(data, bytes) else "w") as f:
+            f.write(data)
+        os.replace(temp_file, path)
+    finally:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+
+
+def _write_manifest(path, manifest):
+    atomic_write(os.path.join(path, MANIFEST_FILE), json.dumps(manifest, indent=1))
+
+
+def _append_values(path, entry, rows, values):
+    # Bytes past the manifest's row count are left over from an interrupted
+    # append; they are cut off before the new rows go in
+    with open(os.path.join(path, entry["file"]), "r+b" if rows else "wb") as f:
+        f.truncate(rows * values.itemsize * (values.shape[1] if values.ndim == 2 else 1))
+        f.seek(0, os.SEEK_END)
+        f.write(values.tobytes())
+
+
+def append_columnar(df, path=COLUMNAR_DATA_PATH, manifest=None):
+    """
+    Append rows dated after the store's last row, in place.
+
+    df must hold exactly the store's columns; values are cast to the stored
+    dtypes. Every column, block and the index grow by len(df) rows, so the
+    cost depends on the rows appended rather than on the history. The new
+    fingerprint chains the previous one with the appended rows, and the
+    manifest records the previous fingerprint and row count as its parent.
+    The manifest is replaced last; until then readers see the old rows only.
+
+    Returns:
+    dict: The new manifest.
+    """
+    manifest = manifest or read_manifest(path)
+    rows = manifest["rows"]
+    if set(df.columns) != set(manifest["columns"]):
+        raise ValueError(f"Columns differ from the store: {sorted(set(df.columns) ^ set(manifest['columns']))}")
+    if not isinstance(df.index, pd.DatetimeIndex) or not df.index.is_monotonic_increasing or not df.index.is_unique:
+        raise ValueError("Appended rows need a sorted, unique DatetimeIndex")
+    index_values = df.index.values.astype("<M8[ns]")
+    if rows and len(df) and index_values[0] <= map_array(path, manifest["index"], rows)[-1]:
+        raise ValueError("Appended rows must be dated after the last stored row")
+    if not len(df):
+        return manifest
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(manifest["fingerprint"].encode())
+    digest.update(index_values.tobytes())
+    _append_values(path, manifest["index"], rows, index_values)
+
+    for column, entry in manifest["columns"].items():
+        values = np.ascontiguousarray(df[column].to_numpy(), dtype=entry["dtype"])
+        digest.update(repr(column).encode())
+        digest.update(values.tobytes())
+        _append_values(path, entry, rows, values)
+
+    for entry in manifest.get("blocks", {}).values():
+        _append_values(path, entry, rows, np.ascontiguousarray(df[entry["columns"]].to_numpy(dtype=entry["dtype"])))
+
+    manifest = {
+        **manifest,
+        "rows": rows + len(df),
+        "fingerprint": digest.hexdigest(),
+        "parent": {"fingerprint": manifest["fingerprint"], "rows": rows},
+    }
+    _write_manifest(path, manifest)
+    return manifest
+
+
+def read_manifest(path=COLUMNAR_DATA_PATH):
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        return json.load(f)
+
+
+def map_array(path, entry, rows):
+    """
+    Memory-map one column (or the index) of the store, read-only and without copying.
+    """
+    if rows == 0:
+        return np.empty(0, dtype=entry["dtype"])
+    return np.memmap(os.path.join(path, entry["file"]), dtype=entry["dtype"], mode="r", shape=(rows,))
+
+
+def map_block(path, entry, rows):
+    """
+    Memory-map one dense block of the store as a read-only (rows, k) array.
+    """
+    shape = (rows, len(entry["columns"]))
+    if rows == 0:
+        return np.empty(shape, dtype=entry["dtype"])
+    return np.memmap(os.path.join(path, entry["file"]), dtype=entry["dtype"], mode="r", shape=shape)
+
+
+def read_tail(path=COLUMNAR_DATA_PATH, n_rows=252, manifest=None):
+    """
+    Columnar store --> DataFrame of its last n_rows rows, every column
+
+    Only the pages holding those rows are read, however long the history is.
+    """
+    manifest = manifest or read_manifest(path)
+    rows = manifest["rows"]
+    start = max(rows - n_rows, 0)
+    index = pd.DatetimeIndex(map_array(path, manifest["index"], rows)[start:], name=manifest["index"]["name"])
+    return pd.DataFrame(
+        {column: np.array(map_array(path, entry, rows)[start:]) for column, entry in manifest["columns"].items()},
+        index=index,
+    )
+
+
+def read_columns(path=COLUMNAR_DATA_PATH, columns=None, manifest=None):
+    """
+    Columnar store --> DataFrame holding only the requested columns
+
+    Columns are memory-mapped, so only the pages a chart touches are read from disk.
+    """
+    manifest = manifest or read_manifest(path)
+    rows = manifest["rows"]
+    columns = list(manifest["columns"]) if columns is None else list(columns)
+
+    missing = [column for column in columns if column not in manifest["columns"]]
+    if missing:
+        raise KeyError(f"Columns not in store: {missing}")
+
+    index = pd.DatetimeIndex(map_array(path, manifest["index"], rows), name=manifest["index"]["name"])
+    return pd.DataFrame(
+        {column: map_array(path, manifest["columns"][column], rows) for column in columns},
+        index=index,
+        copy=False,
+    )
+
@@ -0,0 +1,19 @@
+import pytest
+
+import data_access
+import precompute
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """
+    Run in an empty directory with the data layer's process-wide state reset,
+    and restored afterwards.
+    """
+    monkeypatch.chdir(tmp_path)
+    for name in ['_dataset', '_manifest', '_mapped_index', '_opened_mtime']:
+        monkeypatch.setattr(data_access, name, None)
+    for name in ['_mapped', '_blocks']:
+        monkeypatch.setattr(data_access, name, {})
+    monkeypatch.setattr(precompute, '_frames', {})
+    return tmp_path
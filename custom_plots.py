@@ -1,29 +1,47 @@
-import streamlit as st
+import warnings
+
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
-import plotly.express as px
-from window_functions import calculate_windowed_returns, calculate_windowed_annualized_returns
+from plotly.colors import qualitative
+from assets import ASSETS, RATE_COLUMNS
+from data_access import get_dataset
+from irr_cube import get_series, get_windowed_returns
+from window_functions import calculate_period_returns
+from downsampling import downsample_frame
+
+
+PORTFOLIO_COLUMNS = ['ER_RP_Portfolio_LONG', 'ER_RP_Portfolio_SHORT','RET_RP_Portfolio_LONG', 'RET_RP_Portfolio_SHORT',
+    'ER_TANGENCY_Portfolio_SHORT', 'RET_TANGENCY_Portfolio_SHORT','RET_RPLONGSHORT_DELTA', 'RET_IDEALSHORT_DELTA']
+
+
+def returns_to_window(df, rates=RATE_COLUMNS):
+    # Per-asset return columns of every registered asset in df, the rates, then the portfolios
+    names = ASSETS.names(columns=df.columns)
+    return (ASSETS.columns('RET', names) + [rate for rate in rates if rate in df.columns]
+            + ASSETS.columns('RET_SHORT', names) + ASSETS.columns('ER', names) + ASSETS.columns('ER_SHORT', names)
+            + PORTFOLIO_COLUMNS)
+
+
+def weight_columns(df, kinds=('RP_LONG', 'RP_SHORT', 'IDEAL_SHORT')):
+    return [column for kind in kinds for column in ASSETS.columns(kind, ASSETS.names(columns=df.columns, kind=kind))]
 
 
 def aggregate_daily_returns_to_annualized_returns(df, lookback_window=252, num_months=1):
 
     #WINDOW YEARLY RETURNS
-    returns_to_aggregate=['RET_SPX_d', 'RET_10Y_d', 'RET_DXY_d', 'RET_FFR_d', 'RET_FXR_d', 'RET_SHORT_SPX_d', 'RET_SHORT_10Y_d', 'RET_SHORT_DXY_d', 'ER_SPX_d', 'ER_10Y_d', 'ER_DXY_d',
-        'ER_SHORT_SPX_d', 'ER_SHORT_10Y_d', 'ER_SHORT_DXY_d','ER_RP_Portfolio_LONG', 'ER_RP_Portfolio_SHORT','RET_RP_Portfolio_LONG', 'RET_RP_Portfolio_SHORT',
-        'ER_TANGENCY_Portfolio_SHORT', 'RET_TANGENCY_Portfolio_SHORT','RET_RPLONGSHORT_DELTA', 'RET_IDEALSHORT_DELTA']
+    returns_to_aggregate=returns_to_window(df)
 
 
-    for _column in returns_to_aggregate:
-        agg_colum_name='IRR_'+_column
-        df[agg_colum_name]=calculate_windowed_annualized_returns(df[_column], lookback_window)
+    windowed_returns = get_windowed_returns(df, returns_to_aggregate, [lookback_window])[lookback_window].add_prefix('IRR_')
 
     
 
     #AGG YEAR SUMMARY
-    windowed_columns = [col for col in df.columns if "IRR_" in col]
-    weights_columns=['RP_LONG_SPX', 'RP_LONG_10Y', 'RP_SHORT_SPX','RP_SHORT_10Y', 'RP_SHORT_DXY', 'IDEAL_SHORT_SPX', 'IDEAL_SHORT_10Y', 'IDEAL_SHORT_DXY']
-    df['Counter'] = 1  # Add a counter column
+    windowed_columns = list(windowed_returns.columns)
+    weights_columns=weight_columns(df)
+    # Derived columns go into a new frame; the caller's frame is never written to
+    summary_df = df[weights_columns].join(windowed_returns).assign(Counter=1)  # Add a counter column
 
     agg_dict = {
         **{col: 'mean' for col in weights_columns},
@@ -33,7 +51,7 @@ def aggregate_daily_returns_to_annualized_returns(df, lookback_window=252, num_m
 
     # Resample and aggregate data
     sample_frequency=f'{num_months}M'
-    monthly_df = df.resample(sample_frequency).agg(agg_dict)
+    monthly_df = summary_df.resample(sample_frequency).agg(agg_dict)
     monthly_df = monthly_df.dropna(how='any')
 
     # # Prepare data for plotting
@@ -46,18 +64,34 @@ def aggregate_daily_returns_to_annualized_returns(df, lookback_window=252, num_m
 def create_decade_scatter_plot(
     PLOT_FREQ_MONTHS=1, 
     COLUMN_TO_PLOT='IRR_ER_RP_Portfolio_SHORT', 
-    WEIGHTS_TO_HOVER=['RP_SHORT_SPX','RP_SHORT_10Y','RP_SHORT_DXY'], 
-    MARKETS_TO_HOVER=['IRR_RET_SPX_d','IRR_RET_10Y_d','IRR_RET_DXY_d'], 
+    WEIGHTS_TO_HOVER=None,  # Defaults to RP_SHORT_* of every registered asset
+    MARKETS_TO_HOVER=None,  # Defaults to IRR_RET_*_d of every registered asset
     START_YEAR=1970,
-    IRR_PERIOD_OPTIONS=[1, 3, 6, 12]  # List of IRR period options in months
+    IRR_PERIOD_OPTIONS=[1, 3, 6, 12],  # List of IRR period options in months
+    SELECTED_IRR_PERIOD=None,  # Build only this option, without the dropdown
+    df=None  # Daily data; last, so existing positional calls keep their meaning
 ):
+    # Full daily history from the shared data-access layer unless a frame is given
+    if df is None:
+        df = get_dataset()
+
+    names = ASSETS.names(columns=df.columns)
+    if WEIGHTS_TO_HOVER is None:
+        WEIGHTS_TO_HOVER = ASSETS.columns('RP_SHORT', ASSETS.names(columns=df.columns, kind='RP_SHORT'))
+    if MARKETS_TO_HOVER is None:
+        MARKETS_TO_HOVER = ['IRR_' + column for column in ASSETS.columns('RET', names)]
+
+    # The caller picks the option itself, so only its traces are computed and shipped
+    if SELECTED_IRR_PERIOD is not None:
+        IRR_PERIOD_OPTIONS = [SELECTED_IRR_PERIOD]
+
     def create_trace(irr_period_months):
         lookback_window = 22 * irr_period_months
 
-        df = aggregate_daily_returns_to_annualized_returns(pd.read_pickle("./Data/processed_data.pkl"), lookback_window, PLOT_FREQ_MONTHS)
+        monthly_df = get_series(aggregate_daily_returns_to_annualized_returns, df, lookback_window, PLOT_FREQ_MONTHS)
 
         # Filter data based on START_YEAR
-        filtered_df = df[df.index.year > START_YEAR]
+        filtered_df = monthly_df[monthly_df.index.year > START_YEAR]
 
         # Add Decade column if not present
         if 'Decade' not in filtered_df.columns:
@@ -67,13 +101,38 @@ def create_decade_scatter_plot(
 
         # Get unique decades and create color map
         unique_decades = sorted(filtered_df['Decade'].unique())
-        colors = px.colors.qualitative.Plotly
+        colors = qualitative.Plotly
         color_map = dict(zip(unique_decades, colors[:len(unique_decades)]))
 
+        # Hover payload for every point at once: date ranges as one string array,
+        # the figures as numeric customdata formatted by the hovertemplate
+        end_dates = filtered_df.index.values
+        start_dates = end_dates - np.timedelta64(int(lookback_window / 252 * 365), 'D')
+        date_ranges = np.char.add(np.char.add(start_dates.astype('datetime64[M]').astype(str), ' to '),
+                                  end_dates.astype('datetime64[M]').astype(str))
+        returns = filtered_df[COLUMN_TO_PLOT].to_numpy()
+        customdata = np.column_stack([
+            returns,
+            returns * (lookback_window / 252),
+            -filtered_df[WEIGHTS_TO_HOVER].to_numpy(),
+            filtered_df[MARKETS_TO_HOVER].to_numpy(),
+        ])
+        hover_columns = WEIGHTS_TO_HOVER + MARKETS_TO_HOVER
+        hover_lines = [f" {ASSETS.name_of(column) or column}: %{{customdata[{i}]:.2%}}<br>" for i, column in enumerate(hover_columns, start=2)]
+        hovertemplate = ("Date Range: %{text}<br>"
+                         "Annualized ER: %{customdata[0]:.2%}<br>"
+                         "Total ER. %{customdata[1]:.2%}<br>"
+                         "Weights:<br>"
+                         + "".join(hover_lines[:len(WEIGHTS_TO_HOVER)]) +
+                         "Market AR:<br>"
+                         + "".join(hover_lines[len(WEIGHTS_TO_HOVER):]) +
+                         "<extra></extra>")
+
         traces = []
 
         for i, decade in enumerate(unique_decades):
-            decade_data = filtered_df[filtered_df['Decade'] == decade]
+            in_decade = (filtered_df['Decade'] == decade).to_numpy()
+            decade_data = filtered_df[in_decade]
             
             # Add jitter to y-values
             jitter = np.random.uniform(-0.2, 0.2, len(decade_data))
@@ -88,22 +147,9 @@ def create_decade_scatter_plot(
                     color=color_map[decade],
                     line=dict(width=1, color='DarkSlateGrey')
                 ),
-                text=[f"Date Range: {(date - pd.DateOffset(days=int(lookback_window/252*365))).strftime('%Y-%m')} to {date.strftime('%Y-%m')}<br>"
-                      f"Annualized ER: {return_:.2%}<br>"
-                      f"Total ER. {return_ * (lookback_window / 252):.2%}<br>"
-                      f"Weights:<br>"
-                      f" SPX: {-weights_[WEIGHTS_TO_HOVER[0]]:.2%}<br>"
-                      f" 10Y: {-weights_[WEIGHTS_TO_HOVER[1]]:.2%}<br>"
-                      f" DXY: {-weights_[WEIGHTS_TO_HOVER[2]]:.2%}<br>"
-                      f"Market AR:<br>"
-                      f" SPX: {markets_[MARKETS_TO_HOVER[0]]:.2%}<br>"
-                      f" 10Y: {markets_[MARKETS_TO_HOVER[1]]:.2%}<br>"
-                      f" DXY: {markets_[MARKETS_TO_HOVER[2]]:.2%}<br>"
-                      for date, return_, weights_, markets_ in zip(decade_data.index, 
-                                                                   decade_data[COLUMN_TO_PLOT],
-                                                                   decade_data[WEIGHTS_TO_HOVER].to_dict('records'),
-                                                                   decade_data[MARKETS_TO_HOVER].to_dict('records'))],
-                hoverinfo='text'
+                text=date_ranges[in_decade],
+                customdata=customdata[in_decade],
+                hovertemplate=hovertemplate
             )
             traces.append(trace)
 
@@ -122,32 +168,33 @@ def create_decade_scatter_plot(
     unique_decades = sorted(set(trace.name.replace("'s", "") for trace in fig.data))
 
     # Create and add dropdown menu
-    dropdown_buttons = []
-    for i, irr_period in enumerate(IRR_PERIOD_OPTIONS):
-        visible = [False] * len(fig.data)
-        visible[i*len(fig.data)//len(IRR_PERIOD_OPTIONS):(i+1)*len(fig.data)//len(IRR_PERIOD_OPTIONS)] = [True] * (len(fig.data)//len(IRR_PERIOD_OPTIONS))
-        dropdown_buttons.append(
-            dict(
-                method='update',
-                label=f'{irr_period} Month(s)',
-                args=[{'visible': visible}]
+    if SELECTED_IRR_PERIOD is None:
+        dropdown_buttons = []
+        for i, irr_period in enumerate(IRR_PERIOD_OPTIONS):
+            visible = [False] * len(fig.data)
+            visible[i*len(fig.data)//len(IRR_PERIOD_OPTIONS):(i+1)*len(fig.data)//len(IRR_PERIOD_OPTIONS)] = [True] * (len(fig.data)//len(IRR_PERIOD_OPTIONS))
+            dropdown_buttons.append(
+                dict(
+                    method='update',
+                    label=f'{irr_period} Month(s)',
+                    args=[{'visible': visible}]
+                )
             )
-        )
 
-    fig.update_layout(
-        updatemenus=[
-            dict(
-                buttons=dropdown_buttons,
-                direction="down",
-                pad={"r": 10, "t": 10},
-                showactive=True,
-                x=0.1,
-                xanchor="left",
-                y=1.1,
-                yanchor="top"
-            ),
-        ]
-    )
+        fig.update_layout(
+            updatemenus=[
+                dict(
+                    buttons=dropdown_buttons,
+                    direction="down",
+                    pad={"r": 10, "t": 10},
+                    showactive=True,
+                    x=0.1,
+                    xanchor="left",
+                    y=1.1,
+                    yanchor="top"
+                ),
+            ]
+        )
 
     # Set initial visibility
     fig.data[0].visible = True
@@ -190,21 +237,33 @@ def create_decade_scatter_plot(
 
     return fig
 
-def create_returns_plot(df, select_col='RET_RP_Portfolio_SHORT', lookback_options=[3, 6, 12, 24]):
+def create_returns_plot(df, select_col='RET_RP_Portfolio_SHORT', lookback_options=[3, 6, 12, 24], max_points=None, x_range=None, downsample='lttb', selected_lookback=None):
+    """
+    Daily returns --> line chart of select_col's total return over each lookback, switchable by dropdown
+
+    max_points caps the points per trace (decimated with the downsampling
+    method `downsample`), and x_range (start, end) limits the chart to that
+    span, re-decimated from the full windowed series. selected_lookback (months)
+    builds only that option's trace and no dropdown, for callers with their own control.
+    """
+    if selected_lookback is not None:
+        lookback_options = [selected_lookback]
 
     
     fig = go.Figure()
     
     colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf']
     
+    # All lookbacks share one cumulative-log-sum pass
+    windowed_returns = get_windowed_returns(df, [select_col], [23 * lookback for lookback in lookback_options], annualize=False)
+
     for i, lookback in enumerate(lookback_options):
         lookback_window = 23 * lookback
-        new_col = 'IRR_' + select_col
-        df[new_col] = calculate_windowed_returns(df[select_col], lookback_window)
+        returns = downsample_frame(windowed_returns[lookback_window][select_col], max_points, downsample, x_range)
         
         fig.add_trace(go.Scatter(
-            x=df.index,
-            y=df[new_col],
+            x=returns.index,
+            y=returns,
             mode='lines',
             name=f'{lookback} Month',
             visible=(lookback == lookback_options[0]),
@@ -212,21 +271,21 @@ def create_returns_plot(df, select_col='RET_RP_Portfolio_SHORT', lookback_option
             hovertemplate='%{x|%Y-%m-%d}<br>Return: %{y:.2%}<extra></extra>'
         ))
     
-    dropdown_buttons = []
-    for i, lookback in enumerate(lookback_options):
-        visible = [False] * len(fig.data)
-        visible[i] = True
-        dropdown_buttons.append(
-            dict(
-                method='update',
-                label=f'{lookback} Month Lookback',
-                args=[{'visible': visible},
-                      {'title': f'{select_col} - {lookback} Month'}]
+    updatemenus = []
+    if selected_lookback is None:
+        dropdown_buttons = []
+        for i, lookback in enumerate(lookback_options):
+            visible = [False] * len(fig.data)
+            visible[i] = True
+            dropdown_buttons.append(
+                dict(
+                    method='update',
+                    label=f'{lookback} Month Lookback',
+                    args=[{'visible': visible},
+                          {'title': f'{select_col} - {lookback} Month'}]
+                )
             )
-        )
-    
-    fig.update_layout(
-        updatemenus=[
+        updatemenus.append(
             dict(
                 buttons=dropdown_buttons,
                 direction="down",
@@ -239,8 +298,11 @@ def create_returns_plot(df, select_col='RET_RP_Portfolio_SHORT', lookback_option
                 bgcolor='rgba(255, 255, 255, 0.7)',
                 bordercolor='rgba(0, 0, 0, 0.5)',
                 font=dict(size=12)
-            ),
-        ],
+            )
+        )
+    
+    fig.update_layout(
+        updatemenus=updatemenus,
         title=dict(
             text=f'{select_col} - {lookback_options[0]} Month',
             font=dict(size=24, color='#333'),
@@ -294,28 +356,52 @@ def create_returns_plot(df, select_col='RET_RP_Portfolio_SHORT', lookback_option
     
     return fig
 
-def plot_rolling_excess_returns(df, DXY_LEVERAGE=5):
 
-    colors = px.colors.qualitative.Plotly
+ROLLING_WINDOWS = {63: '3m', 126: '6m', 252: '1y', 504: '2y'}
+
 
-    # Assuming df is your DataFrame with the excess returns data
-    # Make sure df is sorted by date
-    df = df.sort_index()
-    DXY_LEVERAGE=5
+def plot_rolling_excess_returns(df, DXY_LEVERAGE=None, assets=None, max_points=None, x_range=None, downsample='lttb', selected_window=None):
+    """
+    Daily returns --> rolling returns of each asset with a dropdown over the rolling window
 
-    colors = px.colors.qualitative.Plotly
-    df['RET_DXY_d']=df['RET_DXY_d']/DXY_LEVERAGE
+    assets defaults to every registered asset with returns in df; each asset's
+    leverage from the registry is divided out. DXY_LEVERAGE is deprecated: when
+    given it replaces the registry's DXY leverage. max_points, x_range and
+    downsample thin every window's traces (and the series embedded in the
+    dropdown) as in create_returns_plot. selected_window (days) computes only
+    that window and leaves the dropdown out.
+    """
+
+    colors = qualitative.Plotly
 
     # List of assets and windows
-    assets = ['SPX', '10Y', 'DXY']
-    windows = [63, 126, 252, 504]  # 3 months, 6 months, 1 year, 2 years
-    window_labels = ['3m', '6m', '1y', '2y']
+    assets = ASSETS.names(columns=df.columns) if assets is None else list(assets)
+
+    # Unlevered returns as one dense (T, assets) block, in a new frame rather than written into df
+    returns = df[ASSETS.columns('RET', assets)].sort_index()
+    leverage = ASSETS.leverage(assets)
+    if DXY_LEVERAGE is not None:
+        warnings.warn("DXY_LEVERAGE is deprecated; set the leverage in the asset registry instead", DeprecationWarning, stacklevel=2)
+        if 'DXY' in assets:
+            leverage[assets.index('DXY')] = DXY_LEVERAGE
+    returns = pd.DataFrame(ASSETS.block(returns, 'RET', assets) / leverage,
+                           index=returns.index, columns=returns.columns)
+
+    windows = list(ROLLING_WINDOWS)  # 3 months, 6 months, 1 year, 2 years
+    window_labels = list(ROLLING_WINDOWS.values())
+    if selected_window is not None:
+        window_labels = [window_labels[windows.index(selected_window)]]
+        windows = [selected_window]
+    shown_window = 252 if selected_window is None else selected_window
 
     # Calculate rolling IRR for different windows
-    for asset in assets:
-        for window in windows:
-            col_name = f'ROLL_{asset}_IRR_{window}d'
-            df[col_name] = calculate_windowed_annualized_returns(df[f'RET_{asset}_d'], window=window)
+    rolling_irr = get_windowed_returns(returns, [f'RET_{asset}_d' for asset in assets], windows)
+    rolling_frames = {
+        window: downsample_frame(
+            rolling_irr[window][[f'RET_{asset}_d' for asset in assets]].set_axis([f'ROLL_{asset}_IRR_{window}d' for asset in assets], axis=1),
+            max_points, downsample, x_range)
+        for window in windows
+    }
 
     # Create the plot
     fig = go.Figure()
@@ -324,17 +410,17 @@ def plot_rolling_excess_returns(df, DXY_LEVERAGE=5):
     for i, asset in enumerate(assets):
         fig.add_trace(
             go.Scatter(
-                x=df.index, 
-                y=df[f'ROLL_{asset}_IRR_252d'],  # Default to 1-year window
+                x=rolling_frames[shown_window].index, 
+                y=rolling_frames[shown_window][f'ROLL_{asset}_IRR_{shown_window}d'],  # Default to 1-year window
                 name=f"{asset} IRR",
-                line=dict(width=2, color=colors[i])
+                line=dict(width=2, color=colors[i % len(colors)])
             )
         )
 
     # Customize the layout
     fig.update_layout(
         title={
-            'text': "Rolling Excess Returns (1 year)",  # Default title
+            'text': "Rolling Excess Returns (1 year)" if selected_window is None else f"Rolling Returns ({window_labels[0]})",  # Default title
             'y': 0.95,
             'x': 0.5,
             'xanchor': 'center',
@@ -388,65 +474,75 @@ def plot_rolling_excess_returns(df, DXY_LEVERAGE=5):
     )
 
     # Add dropdown for window selection
-    fig.update_layout(
-        updatemenus=[
-            dict(
-                buttons=list([
-                    dict(
-                        args=[{"y": [df[f'ROLL_{asset}_IRR_{window}d'] for asset in assets]},
-                            {"title": f"Rolling Returns ({label})"}],
-                        label=label,
-                        method="update"
-                    ) for window, label in zip(windows, window_labels)
-                ]),
-                direction="down",
-                pad={"r": 10, "t": 10},
-                showactive=True,
-                x=0.9,
-                xanchor="left",
-                y=1.15,
-                yanchor="top"
-            ),
-        ]
-    )
+    if selected_window is None:
+        fig.update_layout(
+            updatemenus=[
+                dict(
+                    buttons=list([
+                        dict(
+                            # Decimated windows pick their own dates, so x travels with y
+                            args=[{"y": [rolling_frames[window][f'ROLL_{asset}_IRR_{window}d'] for asset in assets],
+                                   **({"x": [rolling_frames[window].index] * len(assets)} if max_points is not None else {})},
+                                {"title": f"Rolling Returns ({label})"}],
+                            label=label,
+                            method="update"
+                        ) for window, label in zip(windows, window_labels)
+                    ]),
+                    direction="down",
+                    pad={"r": 10, "t": 10},
+                    showactive=True,
+                    x=0.9,
+                    xanchor="left",
+                    y=1.15,
+                    yanchor="top"
+                ),
+            ]
+        )
 
     return fig
 
-def plot_yield_comparison(df):
+def plot_yield_comparison(df, max_points=None, x_range=None, downsample='lttb'):
+    """
+    Daily yields --> smoothed 10Y and FFR yields with inversions shaded
 
-    # Assuming df is your DataFrame with the yield data
-    # Make sure df is sorted by date
-    df = df.sort_index()
+    max_points, x_range and downsample thin the chart as in create_returns_plot;
+    both yields share the kept dates so the shading stays aligned.
+    """
+
+    # Make sure the yields are sorted by date
+    yields = df[['YIELD_10Y_y', 'YIELD_FFR_y']].sort_index()
 
     # Apply 30-day rolling average for smoothing
-    df['YIELD_10Y_smooth'] = df['YIELD_10Y_y'].rolling(window=14).mean()
-    df['YIELD_FFR_smooth'] = df['YIELD_FFR_y'].rolling(window=14).mean()
+    smooth = pd.DataFrame({
+        'YIELD_10Y_smooth': yields['YIELD_10Y_y'].rolling(window=14).mean(),
+        'YIELD_FFR_smooth': yields['YIELD_FFR_y'].rolling(window=14).mean(),
+    })
 
-    # Calculate the difference
-    df['yield_diff'] = df['YIELD_FFR_smooth'] - df['YIELD_10Y_smooth']
+    # Smoothing runs on the full history; only the plotted rows are thinned
+    smooth = downsample_frame(smooth, max_points, downsample, x_range)
 
     # Create the plot
     fig = go.Figure()
 
     # Add 10Y Treasury Yield
     fig.add_trace(
-    go.Scatter(x=df.index, y=df['YIELD_10Y_smooth'], name="10Y Treasury Yield",
+    go.Scatter(x=smooth.index, y=smooth['YIELD_10Y_smooth'], name="10Y Treasury Yield",
                 line=dict(color='#103766', width=2))  
     )
 
     # Add Federal Funds Rate Yield
     fig.add_trace(
-    go.Scatter(x=df.index, y=df['YIELD_FFR_smooth'], name="Federal Funds Rate",
+    go.Scatter(x=smooth.index, y=smooth['YIELD_FFR_smooth'], name="Federal Funds Rate",
                 line=dict(color='#242c34', width=1)) 
     )
 
-    df['mask'] = df['YIELD_FFR_smooth'] > df['YIELD_10Y_smooth']
+    inverted = smooth['YIELD_FFR_smooth'] > smooth['YIELD_10Y_smooth']
 
     # Delta
     fig.add_trace(
     go.Scatter(
-        x=df.index,
-        y=np.where(df['mask'], df['YIELD_10Y_smooth'], df['YIELD_FFR_smooth']),
+        x=smooth.index,
+        y=np.where(inverted, smooth['YIELD_10Y_smooth'], smooth['YIELD_FFR_smooth']),
         fill='tonexty',
         fillcolor='#e53935',  
         line=dict(width=0),
@@ -521,54 +617,60 @@ def plot_yield_comparison(df):
 
     return fig
 
-def plot_stock_bond_correlation(df):
-    # Assuming df is your DataFrame with the original excess return data and a DateTimeIndex
+CORRELATION_PERIODS = {'Y': ('Year', 'Annual'), 'Q': ('Quarter', 'Quarterly'), 'M': ('Month', 'Monthly')}
+
 
-    # Calculate yearly returns
-    df['Year'] = df.index.year
-    yearly_returns = df.groupby('Year').agg({
-        'RET_SPX_d': lambda x: (1 + x).prod() - 1,
-        'RET_10Y_d': lambda x: (1 + x).prod() - 1
-    }) * 100  # Convert to percentage
+def plot_stock_bond_correlation(df, period='Y'):
+    """
+    Daily dataset --> grouped bars of SPX and 10Y returns compounded per year, quarter or month
+    """
+    period_name, period_adjective = CORRELATION_PERIODS[period]
+
+    # Compounded returns per period, in percent
+    period_returns = calculate_period_returns(df[['RET_SPX_d', 'RET_10Y_d']], period) * 100
+    labels = period_returns.index.astype(str)
+    if period != 'Y':
+        period_returns.index = period_returns.index.to_timestamp()
 
     # Create the grouped bar chart
     fig = go.Figure()
 
-    # Add 10Y Treasury bars
-    fig.add_trace(go.Bar(
-        x=yearly_returns.index,
-        y=yearly_returns['RET_10Y_d'],
-        name='10Y Treasury',
-        hovertemplate='Year: %{x}<br>10Y Treasury: %{y:.2f}%<extra></extra>',
-        marker=dict(
-            color=['#FF9999' if y < 0 else '#FF0000' for y in yearly_returns['RET_10Y_d']],
-            line=dict(
-                color=['#FF3333' if y < 0 else '#FF0000' for y in yearly_returns['RET_10Y_d']],
-                width=[2 if y < 0 else 0 for y in yearly_returns['RET_10Y_d']]
-            ),
-        )
-    ))
+    # Negative periods get a light fill and an outline, positive ones a solid fill
+    for column, name, colors in [
+        ('RET_10Y_d', '10Y Treasury', ('#FF9999', '#FF0000', '#FF3333')),
+        ('RET_SPX_d', 'S&P500', ('#9999FF', '#0000FF', '#3333FF')),
+    ]:
+        negative = period_returns[column].to_numpy() < 0
+        fig.add_trace(go.Bar(
+            x=period_returns.index,
+            y=period_returns[column],
+            name=name,
+            text=labels,
+            textposition='none',
+            hovertemplate=f'{period_name}: %{{text}}<br>{name}: %{{y:.2f}}%<extra></extra>',
+            marker=dict(
+                color=np.where(negative, colors[0], colors[1]),
+                line=dict(
+                    color=np.where(negative, colors[2], colors[1]),
+                    width=np.where(negative, 2, 0)
+                ),
+            )
+        ))
 
-    # Add SPX bars
-    fig.add_trace(go.Bar(
-        x=yearly_returns.index,
-        y=yearly_returns['RET_SPX_d'],
-        name='S&P500',
-        hovertemplate='Year: %{x}<br>S&P500: %{y:.2f}%<extra></extra>',
-        marker=dict(
-            color=['#9999FF' if y < 0 else '#0000FF' for y in yearly_returns['RET_SPX_d']],
-            line=dict(
-                color=['#3333FF' if y < 0 else '#0000FF' for y in yearly_returns['RET_SPX_d']],
-                width=[2 if y < 0 else 0 for y in yearly_returns['RET_SPX_d']]
-            ),
-        )
-    ))
+    # Background bands alternate by calendar year whatever the granularity
+    if period == 'Y':
+        years = period_returns.index.to_numpy()
+        band_starts, band_ends = years - 0.5, years + 0.5  # Cover each year's full width
+    else:
+        years = np.unique(period_returns.index.year)
+        band_starts = pd.to_datetime(years.astype(str), format='%Y')
+        band_ends = pd.to_datetime((years + 1).astype(str), format='%Y')
 
     # Update the layout
     fig.update_layout(
-        title='Annual Returns: SPX vs 10Y Treasury',
-        xaxis_title='Year',
-        yaxis_title='Annual Returns (%)',
+        title=f'{period_adjective} Returns: SPX vs 10Y Treasury',
+        xaxis_title=period_name,
+        yaxis_title=f'{period_adjective} Returns (%)',
         yaxis=dict(tickformat='.2f', ticksuffix='%'),  # Format y-axis ticks as percentages
         barmode='group',
         bargap=0.5,  # Add gap between groups
@@ -589,15 +691,15 @@ def plot_stock_bond_correlation(df):
             type="rect",
             xref="x",
             yref="paper",
-            x0=year - 0.5,  # Start slightly before the year to cover full width
+            x0=band_start,
             y0=0,
-            x1=year + 0.5,  # End slightly after the year to cover full width
+            x1=band_end,
             y1=1,
             fillcolor="lightgray" if i % 2 == 0 else "white",
             opacity=0.2,
             layer="below",
             line_width=0,
-        ) for i, year in enumerate(yearly_returns.index)],
+        ) for i, (band_start, band_end) in enumerate(zip(band_starts, band_ends))],
         # Add toggle switches
         updatemenus=[
             dict(
@@ -609,18 +711,18 @@ def plot_stock_bond_correlation(df):
                 buttons=list([
                     dict(label="All",
                         method="update",
-                        args=[{"y": [yearly_returns['RET_10Y_d'], yearly_returns['RET_SPX_d']]},
-                            {"title": "Annual Returns: SPX vs 10Y Treasury"}]),
+                        args=[{"y": [period_returns['RET_10Y_d'], period_returns['RET_SPX_d']]},
+                            {"title": f"{period_adjective} Returns: SPX vs 10Y Treasury"}]),
                     dict(label="Positive Only",
                         method="update",
-                        args=[{"y": [[y if y >= 0 else None for y in yearly_returns['RET_10Y_d']],
-                                    [y if y >= 0 else None for y in yearly_returns['RET_SPX_d']]]},
-                            {"title": "Annuals Returns: SPX vs 10Y Treasury (Positive Only)"}]),
+                        args=[{"y": [period_returns['RET_10Y_d'].where(period_returns['RET_10Y_d'] >= 0),
+                                    period_returns['RET_SPX_d'].where(period_returns['RET_SPX_d'] >= 0)]},
+                            {"title": f"{period_adjective} Returns: SPX vs 10Y Treasury (Positive Only)"}]),
                     dict(label="Negative Only",
                         method="update",
-                        args=[{"y": [[y if y < 0 else None for y in yearly_returns['RET_10Y_d']],
-                                    [y if y < 0 else None for y in yearly_returns['RET_SPX_d']]]},
-                            {"title": "Annual Returns: SPX vs 10Y Treasury (Negative Only)"}]),
+                        args=[{"y": [period_returns['RET_10Y_d'].where(period_returns['RET_10Y_d'] < 0),
+                                    period_returns['RET_SPX_d'].where(period_returns['RET_SPX_d'] < 0)]},
+                            {"title": f"{period_adjective} Returns: SPX vs 10Y Treasury (Negative Only)"}]),
                 ]),
             )
         ]
@@ -630,78 +732,75 @@ def plot_stock_bond_correlation(df):
     return fig
 
 
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import numpy as np
-
-def plot_portfolio_returns_bubble_year(df, window_size=256):
-    #WINDOW YEARLY RETURNS
-    returns_to_aggregate=['RET_SPX_d', 'RET_10Y_d', 'RET_DXY_d', 'RET_FFR_d', 'RET_SHORT_SPX_d', 'RET_SHORT_10Y_d', 'RET_SHORT_DXY_d', 'ER_SPX_d', 'ER_10Y_d', 'ER_DXY_d',
-        'ER_SHORT_SPX_d', 'ER_SHORT_10Y_d', 'ER_SHORT_DXY_d','ER_RP_Portfolio_LONG', 'ER_RP_Portfolio_SHORT','RET_RP_Portfolio_LONG', 'RET_RP_Portfolio_SHORT',
-        'ER_TANGENCY_Portfolio_SHORT', 'RET_TANGENCY_Portfolio_SHORT','RET_RPLONGSHORT_DELTA', 'RET_IDEALSHORT_DELTA']
-
-    for _column in returns_to_aggregate:
-        agg_column_name='WINDOWED_'+_column
-        df[agg_column_name]=calculate_windowed_returns(df[_column],window_size)
-
-
-    #AGG YEAR SUMMARY
-    windowed_columns = [col for col in df.columns if "WINDOWED" in col]
-    weights_columns=['RP_LONG_SPX', 'RP_LONG_10Y', 'RP_SHORT_SPX','RP_SHORT_10Y', 'RP_SHORT_DXY']
-
-    agg_dict = {
-        **{col: 'mean' for col in weights_columns},
-        **{col: 'last' for col in windowed_columns},
-        **{col: 'count' for col in ['Year']}
-    }
-
-    years=df.groupby('Year').aggregate(agg_dict)
-    years['WINDOWED_RET_RPLONGSHORT_DELTA']=years['WINDOWED_RET_RPLONGSHORT_DELTA']*100
-    performance_df=years.dropna(how='any') #[[col for col in years.columns if (("RP" in col) or ("d" in col and ("SHORT" and "FFR") not in col)) and "ER" not in col]]*100
-
-    # Assuming 'years' is your dataframe
-    # Create a new column for the adjusted delta values
-    years = performance_df[performance_df.index>=1970]
-    years['Adjusted_Delta'] = np.maximum(years['WINDOWED_RET_RPLONGSHORT_DELTA'], 0) + 1
-
-    years['hover_text'] = years.apply(lambda row: f"""
-    Year: {row.name}
-    
-    Performance: {row['WINDOWED_RET_RP_Portfolio_SHORT']:.2%}
-
-    Weights:
-    {-row['RP_SHORT_SPX']:.2%} SPX
-    {-row['RP_SHORT_10Y']:.2%} 10Y
-    {-row['RP_SHORT_DXY']:.2%} DXY
 
+BUBBLE_PERIODS = {'Y': 'Year', 'Q': 'Quarter', 'M': 'Month', 'W': 'Week'}
 
-    Delta: {row['WINDOWED_RET_RPLONGSHORT_DELTA']/100:.2%}
 
-    Market:
-    SPX: {row['WINDOWED_RET_SPX_d']:.2%}
-    10YT: {row['WINDOWED_RET_10Y_d']:.2%}
-    DXY: {row['WINDOWED_RET_DXY_d']:.2%}
+def portfolio_period_summary(df, window_size=256, period='Y'):
+    """
+    Daily dataset --> mean weights and last windowed (total) returns for each period
 
-    """.strip(), axis=1)
+    Returns:
+    pd.DataFrame: One row per year (Year index) or period start, from 1970 on.
+    """
+    #WINDOW YEARLY RETURNS
+    returns_to_aggregate=returns_to_window(df, rates=['RET_FFR_d'])
+    weights_columns=weight_columns(df, kinds=('RP_LONG', 'RP_SHORT'))
+
+    windowed_returns = get_windowed_returns(df, returns_to_aggregate, [window_size], annualize=False)[window_size].add_prefix('WINDOWED_')
+
+    #AGG PERIOD SUMMARY
+    periods = df['Year'] if period == 'Y' else df.index.to_period(period).to_timestamp()
+    years = df[weights_columns].groupby(periods).mean().join(windowed_returns.groupby(periods).last())
+    years = years.dropna(how='any')
+    period_years = years.index if period == 'Y' else years.index.year
+    return years[period_years >= 1970]
+
+
+def plot_portfolio_returns_bubble_year(df, window_size=256, period='Y'):
+    """
+    Daily dataset --> bubble plot of the short-only risk parity returns, one bubble per period
+
+    period is a key of BUBBLE_PERIODS: 'Y' plots calendar years as before, 'Q',
+    'M' and 'W' plot quarters, months or weeks (x is the period start).
+    """
+    period_name = BUBBLE_PERIODS[period]
+    names = ASSETS.names(columns=df.columns, kind='RP_SHORT')
+    years = get_series(portfolio_period_summary, df, window_size, period)
+
+    delta = years['WINDOWED_RET_RPLONGSHORT_DELTA'].to_numpy()
+    adjusted_delta = np.maximum(delta * 100, 0) + 1
+
+    # Hover figures as one numeric block; the labels are formatted in a single array cast
+    labels = years.index.astype(str) if period == 'Y' else years.index.values.astype('datetime64[D]').astype(str)
+    customdata = np.column_stack([
+        years['WINDOWED_RET_RP_Portfolio_SHORT'].to_numpy(),
+        -years[ASSETS.columns('RP_SHORT', names)].to_numpy(),
+        delta,
+        years[['WINDOWED_' + column for column in ASSETS.columns('RET', names)]].to_numpy(),
+    ])
+    n_assets = len(names)
+    hovertemplate = (f"{period_name}: %{{text}}<br><br>"
+                     "Performance: %{customdata[0]:.2%}<br><br>"
+                     "Weights:<br>"
+                     + "".join(f"%{{customdata[{i}]:.2%}} {name}<br>" for i, name in enumerate(names, start=1)) +
+                     f"<br>Delta: %{{customdata[{n_assets + 1}]:.2%}}<br><br>"
+                     "Market:<br>"
+                     + "<br>".join(f"{name}: %{{customdata[{i}]:.2%}}" for i, name in enumerate(names, start=n_assets + 2)) +
+                     "<extra></extra>")
 
     # Create opacity values based on delta
-    years['opacity'] = np.where(years['WINDOWED_RET_RPLONGSHORT_DELTA'] >= 0, 0.8, 0.3)
+    opacity = np.where(delta >= 0, 0.8, 0.3)
 
-    # Create the bubble plot
-    fig = px.scatter(
-        years,
+    # Create the bubble plot; graph_objects rather than plotly.express, whose
+    # template lookups are not safe to run from several threads at once
+    fig = go.Figure(go.Scatter(
         x=years.index,
-        y='WINDOWED_RET_RP_Portfolio_SHORT',
-        size='Adjusted_Delta',
-        hover_name=years.index,
-        custom_data=['hover_text'],
-        labels={
-            'WINDOWED_RET_RP_Portfolio_SHORT': 'Returns',
-            'index': 'Year'
-        },
-        title='Strategy Returns by Year'
-    )
+        y=years['WINDOWED_RET_RP_Portfolio_SHORT'].to_numpy(),
+        mode='markers',
+        marker=dict(size=adjusted_delta, sizemode='area'),
+        showlegend=False,
+    ))
 
     # Customize the layout
     fig.update_layout(
@@ -716,7 +815,7 @@ def plot_portfolio_returns_bubble_year(df, window_size=256):
 
         annotations=[
             dict(
-                text='Absolute Returns by Year',  # Your subtitle text
+                text=f'Absolute Returns by {period_name}',  # Your subtitle text
                 xref='paper',
                 yref='paper',
                 x=0.5,
@@ -728,9 +827,9 @@ def plot_portfolio_returns_bubble_year(df, window_size=256):
             )
         ],
 
-        xaxis_title='Year',
+        xaxis_title=period_name,
         yaxis_title='Return',
-        xaxis=dict(tickangle=45, dtick=5),
+        xaxis=dict(tickangle=45, dtick=5 if period == 'Y' else None),
         yaxis=dict(tickformat='1%', gridcolor='lightgrey'),
         plot_bgcolor='white',
         hovermode='closest',
@@ -742,13 +841,15 @@ def plot_portfolio_returns_bubble_year(df, window_size=256):
     # Update the traces
     fig.update_traces(
         marker=dict(
-            sizeref=2.*max(years['Adjusted_Delta'])/(40.**2),
+            sizeref=2.*max(adjusted_delta)/(40.**2),
             sizemin=4,
             line=dict(width=1, color='DarkSlateGrey'),
             color='LightSeaGreen',
-            opacity=years['opacity']  # Use the opacity column
+            opacity=opacity
         ),
-        hovertemplate='%{customdata[0]}',
+        text=labels,
+        customdata=customdata,
+        hovertemplate=hovertemplate,
     )
 
     # Add a horizontal line at y=0
@@ -767,3 +868,45 @@ def plot_portfolio_returns_bubble_year(df, window_size=256):
     )
 
     return fig
+
+
+def plot_sweep_heatmap(results, value='sharpe', x='lookback', y='dxy_leverage', holding_months=6, days_per_month=22):
+
+    # One cell per (x, y) scenario for the chosen holding window
+    scenario = results[(results['holding_months'] == holding_months) & (results['days_per_month'] == days_per_month)]
+    table = scenario.pivot_table(index=y, columns=x, values=value)
+
+    percent_metrics = ['annual_er', 'annual_vol', 'max_drawdown', 'hit_rate', 'median_holding_return', 'worst_holding_return', 'best_holding_return']
+    value_format = '.1%' if value in percent_metrics else '.2f'
+
+    fig = go.Figure(go.Heatmap(
+        z=table.values,
+        x=[str(column) for column in table.columns],
+        y=[str(row) for row in table.index],
+        colorscale='RdBu',
+        zmid=0,
+        texttemplate=f'%{{z:{value_format}}}',
+        hovertemplate=f'{x}: %{{x}}<br>{y}: %{{y}}<br>{value}: %{{z:{value_format}}}<extra></extra>',
+        colorbar=dict(title=value, tickformat=value_format)
+    ))
+
+    fig.update_layout(
+        title={
+            'text': f'Short-All Sweep: {value} ({holding_months}m holding, {days_per_month}d months)',
+            'y': 0.95,
+            'x': 0.5,
+            'xanchor': 'center',
+            'yanchor': 'top',
+            'font': dict(size=20)
+        },
+        xaxis_title=x,
+        yaxis_title=y,
+        xaxis=dict(type='category'),
+        yaxis=dict(type='category'),
+        plot_bgcolor='white',
+        width=1000,
+        height=500,
+        margin=dict(t=100, l=80, r=40, b=60)
+    )
+
+    return fig
@@ -0,0 +1,228 @@
+import hashlib
+import os
+import threading
+import weakref
+
+import pandas as pd
+import numpy as np
+from assets import ASSETS
+from columnar_store import COLUMNAR_DATA_PATH, MANIFEST_FILE, has_columnar, map_array, map_block, read_manifest
+from instrumentation import INSTRUMENTATION
+
+
+PROCESSED_DATA_PATH = "./Data/processed_data.pkl"
+
+# Frames handed out here share memory with the opened dataset. Under
+# copy-on-write (always on from pandas 3) a write to one of them copies the
+# affected column first, so callers can never change the shared data.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+_lock = threading.Lock()
+_dataset = None
+_manifest = None
+_mapped = {}
+_mapped_index = None
+_blocks = {}
+_opened_mtime = None
+_disk_reads = 0
+_render_disk_reads = 0
+
+_FINGERPRINTS = {}
+
+
+def dataset_fingerprint(df):
+    """
+    DataFrame --> hex digest of its index, column names and values
+
+    The digest is memoized per frame object, so frames are treated as immutable
+    once they have been fingerprinted.
+    """
+    key = id(df)
+    cached = _FINGERPRINTS.get(key)
+    if cached is not None and cached[0]() is df:
+        return cached[1]
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(list(df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    fingerprint = digest.hexdigest()
+
+    _FINGERPRINTS[key] = (weakref.ref(df, lambda _ref: _FINGERPRINTS.pop(key, None)), fingerprint)
+    return fingerprint
+
+
+def _open_dataset():
+    """
+    Open the dataset once per process: the columnar store's manifest when it
+    exists, otherwise the full pickle.
+    """
+    global _dataset, _manifest, _disk_reads, _render_disk_reads, _opened_mtime
+
+    with _lock:
+        if _manifest is None and _dataset is None:
+            if has_columnar(COLUMNAR_DATA_PATH):
+                _manifest = read_manifest(COLUMNAR_DATA_PATH)
+            else:
+                _dataset = pd.read_pickle(PROCESSED_DATA_PATH)
+            _opened_mtime = os.stat(_source_file()).st_mtime_ns
+            # Markets beyond the built-in ones are registered from the columns they bring
+            ASSETS.discover(_manifest['columns'] if _manifest is not None else _dataset.columns)
+            _disk_reads += 1
+            _render_disk_reads += 1
+            INSTRUMENTATION.count('dataset_disk_reads')
+
+
+def _source_file():
+    if _manifest is not None:
+        return os.path.join(COLUMNAR_DATA_PATH, MANIFEST_FILE)
+    return PROCESSED_DATA_PATH
+
+
+def _read_mapped(columns):
+    global _mapped_index
+
+    columns = list(_manifest["columns"]) if columns is None else list(columns)
+    missing = [column for column in columns if column not in _manifest["columns"]]
+    if missing:
+        raise KeyError(f"Columns not in store: {missing}")
+
+    rows = _manifest["rows"]
+    with _lock:
+        if _mapped_index is None:
+            _mapped_index = pd.DatetimeIndex(map_array(COLUMNAR_DATA_PATH, _manifest["index"], rows), name=_manifest["index"]["name"])
+        # One long-lived frame per mapped column: the frames handed out are
+        # views of these, which is what lets copy-on-write protect the
+        # read-only maps from writes
+        for column in columns:
+            if column not in _mapped:
+                _mapped[column] = pd.DataFrame({column: map_array(COLUMNAR_DATA_PATH, _manifest["columns"][column], rows)}, index=_mapped_index, copy=False)
+
+    if not columns:
+        return pd.DataFrame(index=_mapped_index)
+    return pd.concat([_mapped[column] for column in columns], axis=1)
+
+
+def get_dataset(columns=None):
+    """
+    Processed daily dataset, opened once per process.
+
+    With the columnar store only the requested columns are memory-mapped
+    (zero copy); the pickle is the fallback when no store has been built.
+
+    Returns:
+    pd.DataFrame: View of the shared data. Writes to the view, in place or
+    not, copy first and leave the shared data untouched.
+    """
+    _open_dataset()
+    if _manifest is not None:
+        return _read_mapped(columns)
+    if columns is None:
+        return _dataset.copy(deep=False)
+    return _dataset[list(columns)]
+
+
+def get_block(columns):
+    """
+    Dense (T, k) float block of the given dataset columns, in that order.
+
+    When the columnar store holds a block with exactly these columns it is
+    memory-mapped without copying; otherwise the columns are stacked once.
+
+    Returns:
+    np.ndarray: Read-only block, one column per requested column.
+    """
+    _open_dataset()
+    columns = list(columns)
+    if _manifest is not None:
+        for name, entry in _manifest.get("blocks", {}).items():
+            if entry["columns"] == columns:
+                with _lock:
+                    if name not in _blocks:
+                        _blocks[name] = map_block(COLUMNAR_DATA_PATH, entry, _manifest["rows"])
+                return _blocks[name]
+    block = np.ascontiguousarray(get_dataset(columns).to_numpy(dtype=float))
+    block.setflags(write=False)
+    return block
+
+
+def dataset_version():
+    """
+    Fingerprint of the dataset, used to key derived-data caches.
+    """
+    _open_dataset()
+    if _manifest is not None:
+        return _manifest["fingerprint"]
+    return dataset_fingerprint(_dataset)
+
+
+def reload():
+    """
+    Forget the opened dataset so the next read sees rows appended since.
+
+    Frames already handed out keep the rows they were given; derived-data
+    caches move to the new version through dataset_version().
+
+    Returns:
+    bool: True when the dataset on disk has a new version.
+    """
+    global _dataset, _manifest, _mapped, _mapped_index, _blocks
+
+    previous = dataset_version() if _manifest is not None or _dataset is not None else None
+    with _lock:
+        _dataset = None
+        _manifest = None
+        _mapped = {}
+        _mapped_index = None
+        _blocks = {}
+    return previous is None or dataset_version() != previous
+
+
+def changed_on_disk():
+    """
+    True when the dataset file was rewritten (e.g. rows appended) since it was opened.
+    """
+    if _opened_mtime is None:
+        return False
+    try:
+        return os.stat(_source_file()).st_mtime_ns != _opened_mtime
+    except FileNotFoundError:
+        return True
+
+
+def reload_if_changed():
+    """
+    reload() when the dataset file was rewritten (e.g. rows appended) since it was opened.
+
+    Returns:
+    bool: True when the dataset on disk has a new version.
+    """
+    return changed_on_disk() and reload()
+
+
+def extends(version):
+    """
+    True when the opened dataset is the one with that version plus rows
+    appended by one append_columnar call, so values derived from the old rows
+    still hold.
+    """
+    _open_dataset()
+    return _manifest is not None and _manifest.get("parent", {}).get("fingerprint") == version
+
+
+def start_render():
+    """
+    Reset the per-render disk read counter. Call once at the top of a script run.
+    """
+    global _render_disk_reads
+
+    with _lock:
+        _render_disk_reads = 0
+
+
+def disk_reads(per_render=True):
+    """
+    Number of times the dataset was read from disk, for the current render or
+    for the lifetime of the process.
+    """
+    return _render_disk_reads if per_render else _disk_reads
@@ -0,0 +1,118 @@
+import numpy as np
+
+
+def lttb_indices(x, y, max_points):
+    """
+    Largest-triangle-three-buckets: positions of max_points samples that keep the visual shape of y(x)
+
+    The first and last points are always kept. The interior is split into
+    max_points - 2 equal-count buckets; from each bucket the point forming the
+    largest triangle with the previously kept point and the next bucket's
+    average is selected.
+
+    Returns:
+    np.ndarray: Sorted positions into x and y.
+    """
+    n_rows = len(y)
+    if max_points >= n_rows:
+        return np.arange(n_rows)
+    if max_points < 3:
+        return np.array([0, n_rows - 1])[:max(max_points, 0)]
+
+    # Bucket edges over the interior points; every bucket holds at least one point
+    edges = np.linspace(1, n_rows - 1, max_points - 1).astype(np.int64)
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[1:n_rows - 1], edges[:-1] - 1) / counts
+    mean_y = np.add.reduceat(y[1:n_rows - 1], edges[:-1] - 1) / counts
+    # Each bucket looks ahead to the next bucket's average, the last one to the final point
+    anchor_x = np.append(mean_x[1:], x[-1])
+    anchor_y = np.append(mean_y[1:], y[-1])
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n_rows - 1
+    previous = 0
+    for i in range(max_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[previous] - anchor_x[i]) * (y[lo:hi] - y[previous])
+                      - (x[previous] - x[lo:hi]) * (anchor_y[i] - y[previous]))
+        previous = lo + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+
+def minmax_indices(x, y, max_points):
+    """
+    Min/max decimation: positions of the lowest and highest y in each of (max_points - 2) // 2 equal-count buckets
+
+    Keeps every spike, which LTTB can smooth over, at the cost of a less even
+    spacing. The first and last points are always kept, within the budget.
+
+    Returns:
+    np.ndarray: Sorted positions into x and y.
+    """
+    n_rows = len(y)
+    if max_points >= n_rows:
+        return np.arange(n_rows)
+    n_buckets = (max_points - 2) // 2
+    if n_buckets < 1:
+        return np.array([0, n_rows - 1])[:max(max_points, 0)]
+
+    edges = np.linspace(0, n_rows, n_buckets + 1).astype(np.int64)
+    starts = edges[:-1]
+    bucket = np.repeat(np.arange(len(starts)), np.diff(edges))
+
+    # First position in each bucket that hits the bucket's min (or max)
+    selected = [[0, n_rows - 1]]
+    for extreme in (np.minimum, np.maximum):
+        hits = np.flatnonzero(y == extreme.reduceat(y, starts)[bucket])
+        _, first = np.unique(bucket[hits], return_index=True)
+        selected.append(hits[first])
+    return np.unique(np.concatenate(selected))
+
+
+DOWNSAMPLERS = {'lttb': lttb_indices, 'minmax': minmax_indices}
+
+
+def downsample_indices(x, values, max_points, method='lttb'):
+    """
+    Positions to keep so that every column of values (T,) or (T, k) is drawn from at most max_points points
+
+    Columns share one set of positions (the union of each column's picks from
+    an equal share of the budget), so traces drawn on the same x stay aligned.
+    NaN points are skipped.
+
+    Returns:
+    np.ndarray: Sorted positions into x and values.
+    """
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.view(np.int64)
+    x = x.astype(float)
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1:
+        values = values[:, None]
+
+    budget = max(max_points // values.shape[1], 3)
+    selected = []
+    for column in values.T:
+        finite = np.flatnonzero(np.isfinite(column))
+        selected.append(finite[DOWNSAMPLERS[method](x[finite], column[finite], budget)])
+    return np.unique(np.concatenate(selected))
+
+
+def downsample_frame(frame, max_points=None, method='lttb', x_range=None):
+    """
+    Series or DataFrame on a sorted index --> the rows to plot
+
+    x_range (start, end) first limits the rows to that span of the index, so a
+    zoomed view is re-decimated from the full series rather than from an
+    already thinned one. max_points=None keeps every row.
+
+    Returns:
+    pd.Series or pd.DataFrame: The selected rows.
+    """
+    if x_range is not None:
+        frame = frame.loc[x_range[0]:x_range[1]]
+    if max_points is None or len(frame) <= max_points:
+        return frame
+    return frame.iloc[downsample_indices(frame.index, frame.to_numpy(), max_points, method)]
@@ -0,0 +1,222 @@
+import functools
+import hashlib
+import importlib.util
+import inspect
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import plotly
+import plotly.io as pio
+from columnar_store import atomic_write
+from data_access import dataset_fingerprint, dataset_version
+from instrumentation import INSTRUMENTATION
+
+
+FIGURE_CACHE_PATH = "./Data/figure_cache"
+_FIGURE_FILE = re.compile(r'^(?:([0-9a-f]{12})_)?[0-9a-f]{32}\.json$')
+
+# Project modules whose code shapes a figure; editing any of them retires every
+# persisted figure, as a new dataset version does
+FIGURE_CODE_MODULES = ('custom_plots', 'downsampling', 'window_functions', 'irr_cube', 'assets')
+
+
+@functools.lru_cache(maxsize=None)
+def code_version(*modules):
+    """
+    Hash of the source of FIGURE_CODE_MODULES (and any extra modules) and the plotly version
+
+    Returns:
+    str: Hex digest.
+    """
+    digest = hashlib.blake2b(plotly.__version__.encode(), digest_size=16)
+    for module in sorted(set(FIGURE_CODE_MODULES) | set(modules)):
+        try:
+            spec = importlib.util.find_spec(module)
+        except (ImportError, ValueError):
+            spec = None
+        if spec is not None and spec.origin and os.path.exists(spec.origin):
+            with open(spec.origin, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _freeze(value):
+    # Stable, hashable stand-in for a builder argument; frames are keyed by content
+    if isinstance(value, pd.Series):
+        value = value.to_frame()
+    if isinstance(value, pd.DataFrame):
+        return ('frame', dataset_fingerprint(value))
+    if isinstance(value, dict):
+        return ('dict', tuple(sorted((repr(k), _freeze(v)) for k, v in value.items())))
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__, tuple(_freeze(v) for v in value))
+    return repr(value)
+
+
+class FigureCache:
+    """
+    (builder, arguments, dataset version, code version) --> serialized Plotly figure JSON.
+
+    Arguments are bound to the builder's signature with defaults applied, so
+    positional and keyword calls share entries; DataFrame arguments are keyed
+    by their fingerprint. The code version and the default plotly template are
+    part of the key, so edited builders and figures built outside the app
+    (without Streamlit's theme) never serve each other's JSON. The least
+    recently used entries are evicted once max_entries or max_bytes is
+    exceeded.
+
+    With a path, every figure is also written there as <generation>_<key>.json
+    and a cold process reads it back instead of rebuilding. The generation
+    tags the dataset and code version: files of any other generation are
+    deleted after the next write, and the current ones are evicted least
+    recently used first (by mtime, refreshed on every read) beyond
+    max_disk_entries or max_disk_bytes.
+    """
+
+    def __init__(self, max_entries=128, max_bytes=256 * 2 ** 20, path=None, max_disk_entries=1024, max_disk_bytes=1024 * 2 ** 20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.path = path
+        self.max_disk_entries = max_disk_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def key(self, builder, *args, **kwargs):
+        bound = inspect.signature(builder).bind(*args, **kwargs)
+        bound.apply_defaults()
+        frozen = (
+            builder.__module__, builder.__qualname__, _freeze(dict(bound.arguments)),
+            dataset_version(), code_version(builder.__module__), pio.templates.default,
+        )
+        return hashlib.blake2b(repr(frozen).encode(), digest_size=16).hexdigest()
+
+    def _store(self, key, figure_json):
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= len(self._entries.pop(key))
+            self._entries[key] = figure_json
+            self._bytes += len(figure_json)
+            while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._bytes -= len(self._entries.popitem(last=False)[1])
+
+    def generation(self):
+        return hashlib.blake2b(f"{dataset_version()}:{code_version()}".encode(), digest_size=6).hexdigest()
+
+    def _file(self, key):
+        return os.path.join(self.path, f"{self.generation()}_{key}.json")
+
+    def _read(self, key):
+        try:
+            with open(self._file(key)) as f:
+                figure_json = f.read()
+            os.utime(self._file(key))
+        except FileNotFoundError:
+            # Missing, or evicted by another process since it was written
+            return None
+        return figure_json
+
+    def _evict_disk(self):
+        """
+        Delete figures of other generations, then the least recently used
+        beyond max_disk_entries / max_disk_bytes.
+        """
+        generation = self.generation()
+        current = []
+        for entry in os.scandir(self.path):
+            match = _FIGURE_FILE.match(entry.name)
+            if match is None:
+                continue
+            try:
+                if match.group(1) != generation:
+                    os.remove(entry.path)
+                    continue
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            current.append((stat.st_mtime, stat.st_size, entry.path))
+
+        current.sort(reverse=True)
+        kept_bytes = 0
+        for n_kept, (_, size, file) in enumerate(current):
+            kept_bytes += size
+            if n_kept >= self.max_disk_entries or kept_bytes > self.max_disk_bytes:
+                try:
+                    os.remove(file)
+                except FileNotFoundError:
+                    pass
+
+    def get(self, builder, *args, **kwargs):
+        with INSTRUMENTATION.call(builder):
+            return self._get(builder, *args, **kwargs)
+
+    def _get(self, builder, *args, **kwargs):
+        key = self.key(builder, *args, **kwargs)
+
+        figure_json = None
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                figure_json = self._entries[key]
+        if figure_json is not None:
+            INSTRUMENTATION.count('figure_cache_hits')
+            INSTRUMENTATION.note(source='memory', payload_bytes=len(figure_json))
+            return figure_json
+
+        if self.path is not None:
+            with INSTRUMENTATION.stage('read'):
+                figure_json = self._read(key)
+        if figure_json is not None:
+            self.disk_hits += 1
+            self._store(key, figure_json)
+            INSTRUMENTATION.count('figure_cache_disk_hits')
+            INSTRUMENTATION.note(source='disk', payload_bytes=len(figure_json))
+            return figure_json
+
+        with INSTRUMENTATION.stage('build'):
+            figure = builder(*args, **kwargs)
+        with INSTRUMENTATION.stage('serialize'):
+            figure_json = figure.to_json()
+        self.misses += 1
+        self._store(key, figure_json)
+        INSTRUMENTATION.count('figure_cache_misses')
+        INSTRUMENTATION.note(source='build', payload_bytes=len(figure_json))
+
+        if self.path is not None:
+            os.makedirs(self.path, exist_ok=True)
+            atomic_write(self._file(key), figure_json)
+            self._evict_disk()
+        return figure_json
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.disk_hits = 0
+            self.misses = 0
+
+
+FIGURE_CACHE = FigureCache()
+
+
+def cached_figure(builder, *args, **kwargs):
+    """
+    builder(*args, **kwargs) --> Plotly figure dict, served from the shared figure cache
+
+    Returns:
+    dict: The figure as plain data, ready for st.plotly_chart.
+    """
+    with INSTRUMENTATION.call(builder):
+        figure_json = FIGURE_CACHE.get(builder, *args, **kwargs)
+        with INSTRUMENTATION.stage('decode'):
+            return json.loads(figure_json)
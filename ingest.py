@@ -0,0 +1,171 @@
+"""
+Offline ingestion: source files --> columnar datasets the app memory-maps.
+
+    python ingest.py                 # Data/days.xlsx --> Data/days/
+    python ingest.py --from-pickle   # Data/processed_data.pkl --> Data/processed_data/
+
+A conversion is skipped when the source's content hash matches the one
+recorded in the target manifest. The app never imports this module, so
+openpyxl is only needed here (requirements-ingest.txt).
+"""
+import argparse
+import hashlib
+
+import numpy as np
+import pandas as pd
+from assets import ASSETS, RETURN_KINDS
+from columnar_store import COLUMNAR_DATA_PATH, has_columnar, read_manifest, write_columnar
+from data_access import PROCESSED_DATA_PATH
+
+
+WORKBOOK_PATH = "./Data/days.xlsx"
+WORKBOOK_DATA_PATH = "./Data/days"
+
+EXCEL_EPOCH = "1899-12-30"
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _excel_dates(values):
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return pd.DatetimeIndex(values)
+
+    # Older rows of some sheets hold raw Excel serial numbers instead of dates
+    is_serial = values.map(lambda value: isinstance(value, (int, float, np.number)))
+    dates = pd.to_datetime(values.where(~is_serial), errors="coerce")
+    serial_days = pd.to_numeric(values.where(is_serial), errors="coerce")
+    return pd.DatetimeIndex(dates.where(~is_serial, pd.Timestamp(EXCEL_EPOCH) + pd.to_timedelta(serial_days, unit="D")))
+
+
+def _read_sheet(workbook, sheet, value_column):
+    raw = pd.read_excel(workbook, sheet_name=sheet)
+    series = pd.Series(raw[value_column].to_numpy(dtype=float), index=_excel_dates(raw["Date"]))
+    series = series[series.index.notna() & series.notna()]
+    return series[~series.index.duplicated(keep="first")].sort_index()
+
+
+def _modified_duration(yield_decimal, maturity_years=10):
+    """
+    Modified duration of a par bond with semi-annual coupons.
+    """
+    return (1 - (1 + yield_decimal / 2) ** (-2 * maturity_years)) / yield_decimal
+
+
+def build_workbook_dataset(workbook_path=WORKBOOK_PATH):
+    """
+    days.xlsx --> daily frame of prices, yields and the returns derivable from them
+
+    The workbook has no funding (FFR) or foreign short rates, so excess returns
+    and the DXY carry leg cannot be built from it; only price-based returns are.
+
+    Returns:
+    pd.DataFrame: PRICE_SPX, PRICE_DXY, YIELD_10Y_y, DIV_YIELD_SPX_y, RET_SPX_d,
+    RET_10Y_d, RET_DXY_PRICE_d and Year on the union of trading days.
+    """
+    with pd.ExcelFile(workbook_path) as workbook:
+        spx = _read_sheet(workbook, "SPX_d", "Price")
+        dxy = _read_sheet(workbook, "DXY_d", "Price")
+        yield_10y = _read_sheet(workbook, "10Y_d", "Yield")
+        dividends = pd.read_excel(workbook, sheet_name="SPX Dividends")
+
+    # Annual dividend yield, carried forward into years not yet published
+    dividends = dividends.assign(Year=pd.to_numeric(dividends["Year"], errors="coerce")).dropna(subset=["Year", "Dividend Yield"])
+    dividend_yield = pd.Series(dividends["Dividend Yield"].to_numpy(dtype=float), index=dividends["Year"].astype(int))
+    years = np.arange(dividend_yield.index.min(), max(dividend_yield.index.max(), spx.index.year.max()) + 1)
+    dividend_yield = dividend_yield.reindex(years).ffill()
+
+    # Returns are taken on each series' own observation dates before aligning
+    spx_dividend = dividend_yield.reindex(spx.index.year).to_numpy()
+    ret_spx = spx.pct_change() + spx_dividend / 252
+
+    yield_decimal = yield_10y / 100
+    previous_yield = yield_decimal.shift(1)
+    ret_10y = -_modified_duration(previous_yield) * yield_decimal.diff() + previous_yield / 252
+
+    ret_dxy = dxy.pct_change()
+
+    df = pd.DataFrame({
+        "PRICE_SPX": spx,
+        "PRICE_DXY": dxy,
+        "YIELD_10Y_y": yield_10y,
+        "DIV_YIELD_SPX_y": pd.Series(spx_dividend, index=spx.index),
+        "RET_SPX_d": ret_spx,
+        "RET_10Y_d": ret_10y,
+        "RET_DXY_PRICE_d": ret_dxy,
+    })
+    df.index.name = "Date"
+    df["Year"] = df.index.year
+    return df
+
+
+def asset_blocks(df):
+    """
+    One dense block per return kind (RET, ER, RET_SHORT, ER_SHORT) over the assets in df,
+    registering any it brings beyond the built-in ones.
+    """
+    ASSETS.discover(df.columns)
+    blocks = {}
+    for kind in RETURN_KINDS:
+        names = ASSETS.names(columns=df.columns, kind=kind)
+        if names:
+            blocks[kind] = ASSETS.columns(kind, names)
+    return blocks
+
+
+def _up_to_date(out_path, source_hash):
+    return has_columnar(out_path) and read_manifest(out_path).get("source_hash") == source_hash
+
+
+def ingest_workbook(workbook_path=WORKBOOK_PATH, out_path=WORKBOOK_DATA_PATH, force=False):
+    """
+    Convert the workbook into a columnar dataset unless its hash is unchanged.
+
+    Returns:
+    bool: True when the dataset was (re)built.
+    """
+    source_hash = file_hash(workbook_path)
+    if not force and _up_to_date(out_path, source_hash):
+        return False
+
+    write_columnar(build_workbook_dataset(workbook_path), out_path, metadata={"source": workbook_path, "source_hash": source_hash})
+    return True
+
+
+def ingest_pickle(pickle_path=PROCESSED_DATA_PATH, out_path=COLUMNAR_DATA_PATH, force=False):
+    """
+    Convert the processed pickle into the app's columnar store unless its hash is unchanged.
+
+    Returns:
+    bool: True when the store was (re)built.
+    """
+    source_hash = file_hash(pickle_path)
+    if not force and _up_to_date(out_path, source_hash):
+        return False
+
+    df = pd.read_pickle(pickle_path)
+    write_columnar(df, out_path, metadata={"source": pickle_path, "source_hash": source_hash}, blocks=asset_blocks(df))
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--from-pickle", action="store_true", help="convert processed_data.pkl instead of the workbook")
+    parser.add_argument("--source", help="source file (defaults to the workbook or the processed pickle)")
+    parser.add_argument("--out", help="output directory for the columnar dataset")
+    parser.add_argument("--force", action="store_true", help="rebuild even when the source hash is unchanged")
+    args = parser.parse_args()
+
+    if args.from_pickle:
+        source, out = args.source or PROCESSED_DATA_PATH, args.out or COLUMNAR_DATA_PATH
+        built = ingest_pickle(source, out, force=args.force)
+    else:
+        source, out = args.source or WORKBOOK_PATH, args.out or WORKBOOK_DATA_PATH
+        built = ingest_workbook(source, out, force=args.force)
+
+    print(f"{'Built' if built else 'Up to date'}: {source} -> {out}")
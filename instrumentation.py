@@ -0,0 +1,208 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+
+
+def _percentile(values, q):
+    # Nearest-rank percentile; avoids importing numpy for a handful of samples
+    ordered = sorted(values)
+    return ordered[max(math.ceil(q / 100 * len(ordered)) - 1, 0)]
+
+
+def _latency(values):
+    return {
+        'count': len(values),
+        'p50': _percentile(values, 50),
+        'p95': _percentile(values, 95),
+        'last': values[-1],
+    }
+
+
+class Instrumentation:
+    """
+    Opt-in timing of the dashboard's sections and figure builder calls.
+
+    A builder call records where its figure came from (memory, disk or a fresh
+    build), the seconds spent in each stage (compute in the IRR cube, figure
+    construction, serialization to JSON, decoding and rendering in the app)
+    and the payload size in bytes, along with the cache hits and misses it
+    caused. Sections record their wall time. The last history_size entries
+    are kept so p50/p95 latencies cover recent renders only. While disabled,
+    every hook is a no-op.
+
+    Recording is switched on per thread with enable(), so one session's
+    diagnostics run leaves the others alone; always_enabled turns it on for
+    every thread. Work handed to a pool carries context() and runs under
+    worker(context).
+    """
+
+    def __init__(self, enabled=False, history_size=500):
+        self.always_enabled = enabled
+        self.history_size = history_size
+        self.counters = Counter()
+        self._events = deque(maxlen=history_size)
+        self._sections = defaultdict(lambda: deque(maxlen=self.history_size))
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.always_enabled or getattr(self._local, 'enabled', False)
+
+    def enable(self, enabled=True):
+        """
+        Record (or stop recording) on the calling thread, i.e. for one script run.
+        """
+        self._local.enabled = enabled
+
+    def context(self):
+        """
+        The calling thread's recording state, for worker() on a pool thread.
+        """
+        return {'enabled': self.enabled, 'section': getattr(self._local, 'section', None)}
+
+    @contextmanager
+    def worker(self, context):
+        """
+        Record on this thread as the thread that captured context() would.
+        """
+        previous = getattr(self._local, 'enabled', False), getattr(self._local, 'section', None)
+        self._local.enabled, self._local.section = context['enabled'], context['section']
+        try:
+            yield
+        finally:
+            self._local.enabled, self._local.section = previous
+
+    @contextmanager
+    def section(self, name):
+        if not self.enabled:
+            yield
+            return
+        previous = getattr(self._local, 'section', None)
+        self._local.section = name
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self._local.section = previous
+            with self._lock:
+                self._sections[name].append(seconds)
+
+    @contextmanager
+    def call(self, builder, section=None):
+        """
+        One builder call; nested calls for the same figure share the outer record.
+
+        section defaults to the caller's current section; pass it explicitly
+        when the call runs on a worker thread on the section's behalf.
+        """
+        if not self.enabled or getattr(self._local, 'event', None) is not None:
+            yield getattr(self._local, 'event', None)
+            return
+        event = {
+            'section': section or getattr(self._local, 'section', None),
+            'builder': getattr(builder, '__name__', repr(builder)),
+            'time': time.time(),
+            'source': None,
+            'payload_bytes': None,
+            'stages': {},
+            'counters': Counter(),
+        }
+        self._local.event = event
+        start = time.perf_counter()
+        try:
+            yield event
+        finally:
+            self._local.event = None
+            event['seconds'] = time.perf_counter() - start
+            # The builder runs compute and figure construction together; split them here
+            stages = event['stages']
+            if 'build' in stages:
+                stages['figure'] = max(stages.pop('build') - stages.get('compute', 0.0), 0.0)
+            with self._lock:
+                self._events.append(event)
+
+    @contextmanager
+    def stage(self, name):
+        event = getattr(self._local, 'event', None) if self.enabled else None
+        if event is None:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            event['stages'][name] = event['stages'].get(name, 0.0) + time.perf_counter() - start
+
+    def current_section(self):
+        return getattr(self._local, 'section', None)
+
+    def note(self, **fields):
+        event = getattr(self._local, 'event', None) if self.enabled else None
+        if event is not None:
+            event.update(fields)
+
+    def count(self, name, n=1):
+        if not self.enabled or not n:
+            return
+        with self._lock:
+            self.counters[name] += n
+        event = getattr(self._local, 'event', None)
+        if event is not None:
+            event['counters'][name] += n
+
+    def summary(self):
+        """
+        Recorded events --> p50/p95 latency per section and per builder
+
+        Returns:
+        dict: 'sections', 'builders' and the running 'counters'.
+        """
+        with self._lock:
+            sections = {name: list(seconds) for name, seconds in self._sections.items()}
+            events = list(self._events)
+            counters = dict(self.counters)
+
+        by_builder = defaultdict(list)
+        for event in events:
+            by_builder[(event['section'], event['builder'])].append(event)
+
+        builders = []
+        for (section, builder), calls in by_builder.items():
+            stage_names = sorted({name for call in calls for name in call['stages']})
+            payloads = [call['payload_bytes'] for call in calls if call['payload_bytes'] is not None]
+            builders.append({
+                'section': section,
+                'builder': builder,
+                **_latency([call['seconds'] for call in calls]),
+                'stages_p50': {name: _percentile([call['stages'].get(name, 0.0) for call in calls], 50) for name in stage_names},
+                'payload_bytes': payloads[-1] if payloads else None,
+                'sources': dict(Counter(call['source'] for call in calls)),
+            })
+
+        return {
+            'sections': {name: _latency(seconds) for name, seconds in sections.items()},
+            'builders': builders,
+            'counters': counters,
+        }
+
+    def to_json(self):
+        with self._lock:
+            events = [{**event, 'counters': dict(event['counters'])} for event in self._events]
+        return json.dumps({**self.summary(), 'events': events}, indent=1)
+
+    def clear(self):
+        with self._lock:
+            self.counters.clear()
+            self._events.clear()
+            self._sections.clear()
+
+
+# Set DASHBOARD_INSTRUMENTATION=1 to record for the whole life of the process
+ALWAYS_ENABLED = os.environ.get('DASHBOARD_INSTRUMENTATION') == '1'
+INSTRUMENTATION = Instrumentation(enabled=ALWAYS_ENABLED)
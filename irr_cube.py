@@ -0,0 +1,215 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from data_access import dataset_fingerprint
+from instrumentation import INSTRUMENTATION
+from window_functions import calculate_windowed_returns_block
+
+
+class IRRCube:
+    """
+    Lazily built (dataset fingerprint, column, window) --> windowed returns cache.
+
+    Entries hold the total return over the window as read-only arrays; callers
+    ask for annualized returns (IRR) or total returns. The least recently used
+    entries are evicted once they hold more than max_bytes, a bound that
+    follows the data rather than the number of assets and windows.
+    """
+
+    def __init__(self, max_bytes=256 * 2 ** 20):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _add(self, key, values):
+        # Called with the lock held
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous.nbytes
+        self._entries[key] = values
+        self._bytes += values.nbytes
+        while len(self._entries) > 1 and self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+
+    def get(self, df, columns, windows, annualize=True):
+        fingerprint = dataset_fingerprint(df)
+        keys = [(fingerprint, column, window) for window in windows for column in columns]
+
+        with self._lock:
+            found = {}
+            for key in keys:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[key] = self._entries[key]
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        INSTRUMENTATION.count('irr_cube_hits', len(found))
+        INSTRUMENTATION.count('irr_cube_misses', len(keys) - len(found))
+
+        # Build every missing (column, window) pair in one batched pass
+        missing_columns = list(dict.fromkeys(key[1] for key in keys if key not in found))
+        missing_windows = list(dict.fromkeys(key[2] for key in keys if key not in found))
+        if missing_columns:
+            with INSTRUMENTATION.stage('compute'):
+                windowed = calculate_windowed_returns_block(df[missing_columns].to_numpy(dtype=float), missing_windows)
+            with self._lock:
+                for window in missing_windows:
+                    for i, column in enumerate(missing_columns):
+                        # A contiguous copy per entry, so evicting it frees its bytes
+                        values = np.ascontiguousarray(windowed[window][:, i])
+                        values.setflags(write=False)
+                        key = (fingerprint, column, window)
+                        self._add(key, values)
+                        found.setdefault(key, values)
+
+        return {
+            window: pd.DataFrame(
+                {column: found[(fingerprint, column, window)] * (252 / window if annualize else 1) for column in columns},
+                index=df.index,
+            )
+            for window in windows
+        }
+
+    def extend(self, previous, df):
+        """
+        Carry the entries cached for previous over to df, a frame holding the
+        same rows followed by new ones.
+
+        Rows of previous are reused as they are (their values are taken to be
+        unchanged); only the new rows are computed, each from the `window` rows
+        of history it needs, so the work grows with the rows added.
+
+        Returns:
+        int: Number of (column, window) entries carried over.
+        """
+        old_fingerprint, fingerprint = dataset_fingerprint(previous), dataset_fingerprint(df)
+        n_old, n_new = len(previous), len(df) - len(previous)
+        if n_new < 0 or not df.index[:n_old].equals(previous.index):
+            raise ValueError("df does not extend previous")
+
+        with self._lock:
+            carried = {(column, window): values for (key, column, window), values in self._entries.items() if key == old_fingerprint}
+
+        by_window = {}
+        for column, window in carried:
+            by_window.setdefault(window, []).append(column)
+        extended = {}
+        for window, columns in by_window.items():
+            history = df[columns].iloc[max(n_old - window + 1, 0):].to_numpy(dtype=float)
+            tail = calculate_windowed_returns_block(history, [window])[window][len(history) - n_new:]
+            for i, column in enumerate(columns):
+                values = np.concatenate([carried[(column, window)], tail[:, i]])
+                values.setflags(write=False)
+                extended[(fingerprint, column, window)] = values
+
+        with self._lock:
+            for key, values in extended.items():
+                self._add(key, values)
+        return len(extended)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+
+class SeriesCache:
+    """
+    (dataset fingerprint, function, arguments) --> derived frame, such as the
+    monthly aggregates and period summaries the charts are drawn from.
+
+    Cached frames are shared between callers, which must not write to them.
+    extend() carries entries over to a longer frame through per-function
+    tail refreshers instead of recomputing them. The least recently used
+    entries are evicted once max_entries is exceeded.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, function, df, *args):
+        key = (dataset_fingerprint(df), function, args)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                INSTRUMENTATION.count('series_cache_hits')
+                return self._entries[key]
+            self.misses += 1
+        INSTRUMENTATION.count('series_cache_misses')
+        value = function(df, *args)
+        self._store(key, value)
+        return value
+
+    def extend(self, previous, df, refreshers):
+        """
+        Carry the entries cached for previous over to df (previous's rows
+        followed by new ones) with refreshers[function](value, df, *args).
+
+        Returns:
+        int: Number of entries carried over.
+        """
+        old_fingerprint, fingerprint = dataset_fingerprint(previous), dataset_fingerprint(df)
+        with self._lock:
+            carried = [(function, args, value) for (key, function, args), value in self._entries.items()
+                       if key == old_fingerprint and function in refreshers]
+        for function, args, value in carried:
+            self._store((fingerprint, function, args), refreshers[function](value, df, *args))
+        return len(carried)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+IRR_CUBE = IRRCube()
+SERIES_CACHE = SeriesCache()
+
+# Every cache of data derived from a dataset; new ones are registered here
+DERIVED_CACHES = (IRR_CUBE, SERIES_CACHE)
+
+
+def clear_derived_caches():
+    """
+    Empty every derived-data cache, so the next build starts cold.
+    """
+    for cache in DERIVED_CACHES:
+        cache.clear()
+
+
+def get_windowed_returns(df, columns, windows, annualize=True):
+    """
+    Daily Returns Pct --> Decimal Returns % for each window, served from the shared IRR cube
+
+    Returns:
+    dict: window -> pd.DataFrame of annualized (IRR) or total returns for each column.
+    """
+    return IRR_CUBE.get(df, list(columns), list(windows), annualize=annualize)
+
+
+def get_series(function, df, *args):
+    """
+    function(df, *args), served from the shared series cache
+    """
+    return SERIES_CACHE.get(function, df, *args)
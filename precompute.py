@@ -0,0 +1,321 @@
+"""
+Warm every derived series and figure the dashboard can show, ahead of the first visitor.
+
+    python precompute.py            # build everything, exit once the cache is warm
+    python precompute.py --check    # exit 0 only if the cache is warm for the current dataset
+
+Figures for every selectbox option (and the default resolution of the long
+line charts) are built on a thread pool into the figure cache, which writes
+them to disk; the parameter sweep runs on its own process pool and its results
+are saved next to the dataset. When everything is built a readiness file is
+written, so a deploy can run this step (or --check as a health check) before
+taking traffic. The app also starts the same warmup in a background thread
+once per server process.
+"""
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+SWEEP_RESULTS_PATH = "./Data/sweep_results.pkl"
+READY_FILE = "ready.json"
+
+# Options the page offers; streamlit_app.py builds its widgets from these
+TRADE_WINDOWS = [1, 3, 6, 12]
+LOOKBACKS = [6, 12, 24]
+RETURNS_CHARTS = {
+    'tangency': 'ER_TANGENCY_Portfolio_SHORT',
+    'rp_short': 'ER_RP_Portfolio_SHORT',
+    'ideal_delta': 'RET_IDEALSHORT_DELTA',
+    'rp_delta': 'RET_RPLONGSHORT_DELTA',
+}
+POINTS_OPTIONS = [2000, 5000, 500, None]
+DEFAULT_ROLLING_WINDOW = 252
+SWEEP_METRICS = ['sharpe', 'annual_er', 'hit_rate', 'median_holding_return', 'worst_holding_return', 'max_drawdown']
+RP_DECADE_PLOT = dict(
+    PLOT_FREQ_MONTHS=1,
+    COLUMN_TO_PLOT='IRR_ER_RP_Portfolio_SHORT',
+    WEIGHTS_TO_HOVER=['RP_SHORT_SPX','RP_SHORT_10Y','RP_SHORT_DXY'],
+    MARKETS_TO_HOVER=['IRR_ER_SPX_d','IRR_ER_10Y_d','IRR_ER_DXY_d'],
+    START_YEAR=1971,
+)
+
+# Document sections with charts; the sweep heatmaps belong to the Backtest
+DOCUMENT_SECTIONS = ['Overview', 'Portfolio Construction', 'Backtest']
+
+READY = threading.Event()
+
+_sweep_lock = threading.Lock()
+_sweep = {}
+
+# columns -> (dataset version, frame) of every page_data view handed out
+_frames_lock = threading.Lock()
+_frames = {}
+
+
+def default_resolution():
+    from downsampling import DOWNSAMPLERS
+    return dict(max_points=POINTS_OPTIONS[0], x_range=None, downsample=next(iter(DOWNSAMPLERS)))
+
+
+def page_data(columns=None):
+    """
+    The dataset as the page plots it, from 1971 on.
+
+    One frame per columns and dataset version is handed out, so the app and
+    the warmup share it, and reload_if_changed can carry its derived series
+    over to the next version.
+    """
+    import pandas as pd
+    from data_access import dataset_version, get_dataset
+
+    key = None if columns is None else tuple(columns)
+    version = dataset_version()
+    with _frames_lock:
+        cached = _frames.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    df = get_dataset(columns)
+    # A positional slice of the sorted index keeps the columns memory-mapped;
+    # a boolean mask would copy each of them into the process
+    df = df.iloc[df.index.searchsorted(pd.Timestamp('1971-01-01')):]
+    with _frames_lock:
+        _frames[key] = (version, df)
+    return df
+
+
+def reload_if_changed():
+    """
+    data_access.reload_if_changed(), carrying cached derived series over to appended rows
+
+    When the new version is the old one plus rows appended to the columnar
+    store, the windowed returns, aggregates and period summaries cached for
+    the full dataset and for every page_data frame are extended at their tail
+    rather than rebuilt from 1970. Any other change starts from scratch.
+
+    Returns:
+    bool: True when the dataset has a new version.
+    """
+    import data_access
+    from streaming import carry_over
+
+    if not data_access.changed_on_disk():
+        return False
+    previous_version = data_access.dataset_version()
+    previous_full = data_access.get_dataset()
+    with _frames_lock:
+        previous = {key: frame for key, (version, frame) in _frames.items() if version == previous_version}
+    if not data_access.reload():
+        return False
+
+    if data_access.extends(previous_version):
+        carry_over(previous_full, data_access.get_dataset())
+        for columns, frame in previous.items():
+            carry_over(frame, page_data(columns))
+    return True
+
+
+def sweep_results(path=SWEEP_RESULTS_PATH):
+    """
+    Parameter sweep results for the current dataset version
+
+    Computed once per process (concurrent callers wait for the same run) and
+    saved to path, so a fresh process reads them back while the dataset is
+    unchanged. The sweep itself runs as `python sweep.py` in a subprocess: its
+    worker processes can then neither be forked from this (multithreaded)
+    process nor re-import the Streamlit script, which is __main__ here.
+
+    Returns:
+    pd.DataFrame: run_sweep output.
+    """
+    import pandas as pd
+    from columnar_store import atomic_write
+    from data_access import dataset_version
+
+    version = dataset_version()
+    with _sweep_lock:
+        if _sweep.get('version') == version:
+            return _sweep['results']
+
+        results = None
+        if os.path.exists(path):
+            stored = pd.read_pickle(path)
+            if stored['dataset_version'] == version:
+                results = stored['results']
+        if results is None:
+            import sweep
+            sweep_file = f"{path}.{os.getpid()}.results.pkl"
+            try:
+                subprocess.run([sys.executable, sweep.__file__, "--out", sweep_file], check=True, stdout=subprocess.DEVNULL)
+                results = pd.read_pickle(sweep_file)
+            finally:
+                if os.path.exists(sweep_file):
+                    os.remove(sweep_file)
+            atomic_write(path, pickle.dumps({'dataset_version': version, 'results': results}, pickle.HIGHEST_PROTOCOL))
+
+        _sweep.update(version=version, results=results)
+        return results
+
+
+def page_figures(results=None, sections=None):
+    """
+    (builder, args, kwargs) of every figure the page can request
+
+    sections limits them to those document sections (keys of DOCUMENT_SECTIONS).
+    Sweep heatmaps are included when the sweep results are given.
+    """
+    import custom_plots
+
+    sections = DOCUMENT_SECTIONS if sections is None else sections
+    resolution = default_resolution()
+    if 'Overview' in sections:
+        df = page_data()
+        for period in custom_plots.BUBBLE_PERIODS:
+            yield custom_plots.plot_portfolio_returns_bubble_year, (df,), dict(period=period)
+        for months in TRADE_WINDOWS:
+            yield custom_plots.create_decade_scatter_plot, (), dict(SELECTED_IRR_PERIOD=months)
+    if 'Portfolio Construction' in sections:
+        yield custom_plots.plot_yield_comparison, (page_data(('YIELD_10Y_y', 'YIELD_FFR_y')),), resolution
+        for period in custom_plots.CORRELATION_PERIODS:
+            yield custom_plots.plot_stock_bond_correlation, (page_data(('RET_SPX_d', 'RET_10Y_d')),), dict(period=period)
+        returns = page_data(('RET_SPX_d', 'RET_10Y_d', 'RET_DXY_d'))
+        for window in custom_plots.ROLLING_WINDOWS:
+            yield custom_plots.plot_rolling_excess_returns, (returns,), dict(selected_window=window, **resolution)
+    if 'Backtest' in sections:
+        for select_col in RETURNS_CHARTS.values():
+            for lookback in LOOKBACKS:
+                yield custom_plots.create_returns_plot, (page_data((select_col,)),), dict(select_col=select_col, selected_lookback=lookback, **resolution)
+        for months in TRADE_WINDOWS:
+            yield custom_plots.create_decade_scatter_plot, (), dict(RP_DECADE_PLOT, SELECTED_IRR_PERIOD=months)
+
+    if results is not None:
+        yield from sweep_figures(results)
+
+
+def sweep_figures(results):
+    """
+    (builder, args, kwargs) of every sweep heatmap the page can request
+    """
+    from custom_plots import plot_sweep_heatmap
+    from sweep import DEFAULT_GRID
+
+    for metric in SWEEP_METRICS:
+        for holding_months in DEFAULT_GRID['holding_months']:
+            yield plot_sweep_heatmap, (results,), dict(value=metric, holding_months=holding_months)
+
+
+def _ready_file(path):
+    return os.path.join(path, READY_FILE)
+
+
+def warm(max_workers=None, path=None, sections=None):
+    """
+    Build the sweep and every page figure into the shared caches, then set READY.
+
+    With sections, only the figures of those document sections are built (and
+    the sweep only for the Backtest); the readiness file and READY are left to
+    a full warmup. A figure (or the sweep) that fails is recorded and left to
+    be built on demand; the rest of the cache is still warm, so readiness is
+    not held back.
+
+    Returns:
+    dict: Dataset version, number of figures, failures and seconds taken.
+    """
+    from columnar_store import atomic_write
+    from data_access import dataset_version
+    from figure_cache import FIGURE_CACHE, FIGURE_CACHE_PATH, code_version
+
+    # Figures take the default plotly template when they are built; importing
+    # streamlit installs the app's theme, so warmed figures match the page's
+    import streamlit  # noqa: F401
+
+    start = time.perf_counter()
+    if sections is None:
+        READY.clear()
+    path = path or FIGURE_CACHE_PATH
+    FIGURE_CACHE.path = path
+
+    failures = []
+
+    def submit(figures):
+        return [(builder, kwargs, pool.submit(FIGURE_CACHE.get, builder, *args, **kwargs)) for builder, args, kwargs in figures]
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='precompute') as pool:
+        # The sweep fans out to its own process pool while the threads build figures
+        sweep = pool.submit(sweep_results) if sections is None or 'Backtest' in sections else None
+        futures = submit(page_figures(sections=sections))
+        try:
+            futures += submit(sweep_figures(sweep.result()) if sweep is not None else [])
+        except Exception as error:
+            failures.append({'figure': 'sweep_results', 'error': repr(error)})
+        for builder, kwargs, future in futures:
+            try:
+                future.result()
+            except Exception as error:
+                failures.append({'figure': f"{builder.__name__}({kwargs})", 'error': repr(error)})
+
+    status = {
+        'dataset_version': dataset_version(),
+        'code_version': code_version(),
+        'figures': sum(future.exception() is None for _, _, future in futures),
+        'failures': failures,
+        'seconds': time.perf_counter() - start,
+    }
+    if sections is not None:
+        return status
+    os.makedirs(path, exist_ok=True)
+    atomic_write(_ready_file(path), json.dumps(status, indent=1))
+    READY.set()
+    return status
+
+
+def start_background(max_workers=None, sections=None):
+    """
+    Run warm() on a daemon thread; READY is set when a full warmup finishes.
+    """
+    thread = threading.Thread(target=warm, kwargs=dict(max_workers=max_workers, sections=sections), name='precompute', daemon=True)
+    thread.start()
+    return thread
+
+
+def is_ready(path=None):
+    """
+    True when this process has finished warming, or the readiness file on disk
+    was written for the current dataset and figure code.
+    """
+    from data_access import dataset_version
+    from figure_cache import FIGURE_CACHE_PATH, code_version
+
+    if READY.is_set():
+        return True
+    try:
+        with open(_ready_file(path or FIGURE_CACHE_PATH)) as f:
+            status = json.load(f)
+        return status['dataset_version'] == dataset_version() and status['code_version'] == code_version()
+    except (OSError, ValueError, KeyError):
+        return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="only report whether the cache is warm (exit 1 if not)")
+    parser.add_argument("--workers", type=int, default=None, help="thread pool size")
+    args = parser.parse_args()
+
+    if args.check:
+        ready = is_ready()
+        print("ready" if ready else "not ready")
+        sys.exit(0 if ready else 1)
+
+    status = warm(args.workers)
+    print(f"Warmed {status['figures']} figures for dataset {status['dataset_version']} in {status['seconds']:.1f}s")
+    for failure in status['failures']:
+        print(f"failed: {failure['figure']}: {failure['error']}")
+    sys.exit(1 if status['failures'] else 0)
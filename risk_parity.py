@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+from assets import ASSETS
+from rolling_moments import rolling_covariance
+
+
+LONG_ASSETS = ASSETS.names(long=True)
+SHORT_ASSETS = ['SPX', '10Y', 'DXY']
+DXY_LEVERAGE = ASSETS['DXY'].leverage
+
+
+def _equal_risk_contributions(cov, x, free, scale, n_iter, tol=1e-10):
+    """
+    Cyclical coordinate descent on 0.5 x'Cx - scale * sum(log x_free) for a batch
+    of covariance matrices, starting from x; non-free entries of x stay fixed.
+    At the optimum every free asset contributes x_i (Cx)_i = scale of risk.
+    """
+    x = x.copy()
+    for _ in range(n_iter):
+        previous = x.copy()
+        for i in range(cov.shape[1]):
+            rows = free[:, i]
+            if not rows.any():
+                continue
+            c = cov[rows]
+            cross = np.einsum('nj,nj->n', c[:, i, :], x[rows]) - c[:, i, i] * x[rows, i]
+            x[rows, i] = (-cross + np.sqrt(cross ** 2 + 4 * c[:, i, i] * scale[rows])) / (2 * c[:, i, i])
+        if np.max(np.abs(x - previous) / np.maximum(np.abs(x), 1e-300), initial=0) < tol:
+            break
+    return x
+
+
+def risk_parity_weights(cov, upper=None, n_iter=100, n_bisect=60):
+    """
+    Covariance (T, k, k) --> long-only risk parity weights (T, k) summing to 1
+
+    Every day is solved at once with batched coordinate descent. Assets whose
+    weight would exceed `upper` are pinned at the cap and the remaining budget
+    is split with equal risk contributions among the free assets, found by a
+    batched bisection on the risk contribution level.
+    """
+    cov = np.asarray(cov, dtype=float)
+    n_rows, n_assets = cov.shape[:2]
+    upper = np.full(n_assets, np.inf) if upper is None else np.asarray(upper, dtype=float)
+
+    weights = np.full((n_rows, n_assets), np.nan)
+    diag = np.diagonal(cov, axis1=1, axis2=2)
+    valid = np.isfinite(cov).all(axis=(1, 2)) & (diag > 0).all(axis=1)
+    if not valid.any():
+        return weights
+
+    # Unconstrained equal risk contributions are scale free: solve, then normalize
+    cov_valid = cov[valid]
+    inverse_vol = 1 / np.sqrt(diag[valid])
+    all_free = np.ones((len(cov_valid), n_assets), dtype=bool)
+    x = _equal_risk_contributions(cov_valid, inverse_vol, all_free, np.ones(len(cov_valid)), n_iter)
+    w = x / x.sum(axis=1, keepdims=True)
+
+    # Pin assets above their cap and re-split the rest, until no cap binds
+    capped = np.zeros_like(all_free)
+    for _ in range(n_assets):
+        violated = (w > upper + 1e-12) & ~capped
+        rows = violated.any(axis=1)
+        if not rows.any():
+            break
+        capped[rows] |= violated[rows]
+
+        c = cov_valid[rows]
+        free = ~capped[rows]
+        fixed = np.where(capped[rows], upper, 0.0)
+        budget = 1 - fixed.sum(axis=1)
+
+        # The free weights grow monotonically with the risk contribution level;
+        # each bisection step warm-starts from the previous solution
+        low = np.full(len(c), -30.0)
+        high = np.full(len(c), 10.0)
+        x = np.where(free, w[rows], fixed)
+        for _ in range(n_bisect):
+            mid = (low + high) / 2
+            x = _equal_risk_contributions(c, x, free, np.exp(mid), n_iter)
+            too_big = np.where(free, x, 0).sum(axis=1) > budget
+            high = np.where(too_big, mid, high)
+            low = np.where(too_big, low, mid)
+        w[rows] = np.where(free, x * (budget / np.where(free, x, 0).sum(axis=1))[:, None], fixed)
+
+    weights[valid] = w
+    return weights
+
+
+def risk_parity_frame(df, lookback=252, dxy_leverage=DXY_LEVERAGE):
+    """
+    Daily excess returns --> RP_LONG_* and RP_SHORT_* weights for every day
+
+    Weights use the covariance of the ER_*_d columns over the `lookback` days
+    ending on each day. The long portfolio holds SPX and 10Y in [0, 1]; the short
+    portfolio holds SPX, 10Y and DXY in [-1, 0] with |w_dxy| <= 1/dxy_leverage.
+    """
+    short_cov = rolling_covariance(df[[f'ER_{asset}_d' for asset in SHORT_ASSETS]], lookback)
+    long_cov = short_cov[:, :len(LONG_ASSETS), :len(LONG_ASSETS)]
+
+    long_weights = risk_parity_weights(long_cov)
+    short_weights = -risk_parity_weights(short_cov, upper=[1, 1, 1 / dxy_leverage])
+
+    return pd.DataFrame(
+        {
+            **{f'RP_LONG_{asset}': long_weights[:, i] for i, asset in enumerate(LONG_ASSETS)},
+            **{f'RP_SHORT_{asset}': short_weights[:, i] for i, asset in enumerate(SHORT_ASSETS)},
+        },
+        index=df.index,
+    )
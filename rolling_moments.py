@@ -0,0 +1,164 @@
+from collections import deque
+
+import numpy as np
+
+
+class RollingMoments:
+    """
+    Streaming mean and covariance of the last `window` rows, O(k^2) per step.
+
+    Uses Welford-style updates: adding a row and dropping the row that leaves
+    the window both adjust the mean and the co-moment matrix directly, so no
+    large running sums are ever subtracted from each other. Rows containing a
+    NaN are tracked but make the window NaN, matching pandas rolling windows.
+    """
+
+    def __init__(self, n_assets, window):
+        self.window = window
+        self.rows = deque()
+        self.count = 0
+        self.missing = 0
+        self.mean = np.zeros(n_assets)
+        self.comoment = np.zeros((n_assets, n_assets))
+
+    def _add(self, row):
+        self.count += 1
+        delta = row - self.mean
+        self.mean += delta / self.count
+        self.comoment += np.outer(delta, row - self.mean)
+
+    def _remove(self, row):
+        self.count -= 1
+        if self.count == 0:
+            self.mean[:] = 0
+            self.comoment[:] = 0
+            return
+        delta = row - self.mean
+        self.mean -= delta / self.count
+        self.comoment -= np.outer(delta, row - self.mean)
+
+    def update(self, row):
+        row = np.asarray(row, dtype=float)
+        valid = np.isfinite(row).all()
+        self.rows.append((row, valid))
+        if valid:
+            self._add(row)
+        else:
+            self.missing += 1
+
+        if len(self.rows) > self.window:
+            old_row, old_valid = self.rows.popleft()
+            if old_valid:
+                self._remove(old_row)
+            else:
+                self.missing -= 1
+
+    @property
+    def is_ready(self):
+        return len(self.rows) == self.window and self.missing == 0
+
+    def covariance(self):
+        if not self.is_ready or self.window < 2:
+            return np.full_like(self.comoment, np.nan)
+        return self.comoment / (self.window - 1)
+
+    def means(self):
+        if not self.is_ready:
+            return np.full_like(self.mean, np.nan)
+        return self.mean.copy()
+
+
+def _rolling_moments_sums(values, windows):
+    n_rows, n_assets = values.shape
+
+    # Centering on the full-sample mean keeps the running sums small
+    valid = np.isfinite(values).all(axis=1)
+    center = np.nanmean(values[valid], axis=0) if valid.any() else np.zeros(n_assets)
+    centered = np.where(valid[:, None], values - center, 0.0)
+
+    # One set of cumulative sums serves every window
+    sums = np.zeros((n_rows + 1, n_assets))
+    np.cumsum(centered, axis=0, out=sums[1:])
+    cross_products = np.zeros((n_rows + 1, n_assets, n_assets))
+    np.cumsum(centered[:, :, None] * centered[:, None, :], axis=0, out=cross_products[1:])
+    invalid_rows = np.concatenate([[0], np.cumsum(~valid)])
+
+    moments = {}
+    for window in windows:
+        mean = np.full((n_rows, n_assets), np.nan)
+        cov = np.full((n_rows, n_assets, n_assets), np.nan)
+        if 1 < window <= n_rows:
+            window_sum = sums[window:] - sums[:-window]
+            window_cross = cross_products[window:] - cross_products[:-window]
+            window_mean = window_sum / window
+            window_cov = (window_cross - window_sum[:, :, None] * window_mean[:, None, :]) / (window - 1)
+
+            has_missing = invalid_rows[window:] - invalid_rows[:-window] > 0
+            window_mean[has_missing] = np.nan
+            window_cov[has_missing] = np.nan
+            mean[window - 1:] = window_mean + center
+            cov[window - 1:] = window_cov
+        moments[window] = (mean, cov)
+
+    return moments
+
+
+def _rolling_moments_welford(values, window):
+    n_rows, n_assets = values.shape
+    mean = np.full((n_rows, n_assets), np.nan)
+    cov = np.full((n_rows, n_assets, n_assets), np.nan)
+
+    moments = RollingMoments(n_assets, window)
+    for t in range(n_rows):
+        moments.update(values[t])
+        if moments.is_ready:
+            mean[t] = moments.mean
+            cov[t] = moments.covariance()
+
+    return mean, cov
+
+
+def rolling_moments_windows(returns, windows, method='sums'):
+    """
+    Daily returns (T, k) --> rolling mean (T, k) and covariance (T, k, k) for several windows
+
+    Each row covers the window ending on that day (ddof=1); windows with a NaN
+    row are NaN. method='sums' differences one set of cumulative sums and
+    cross-products shared by all windows (O(T k^2) memory); method='welford'
+    streams RollingMoments row by row for the numerically stable result.
+
+    Returns:
+    dict: window -> (mean, cov)
+    """
+    values = np.asarray(returns, dtype=float)
+    if values.ndim == 1:
+        values = values[:, None]
+
+    if method == 'sums':
+        return _rolling_moments_sums(values, windows)
+    if method == 'welford':
+        return {window: _rolling_moments_welford(values, window) for window in windows}
+    raise ValueError(f"Unknown method: {method}")
+
+
+def rolling_moments(returns, window=252, method='sums'):
+    """
+    Daily returns (T, k) --> rolling mean (T, k) and covariance (T, k, k) of the window ending on each day
+    """
+    return rolling_moments_windows(returns, [window], method)[window]
+
+
+def rolling_covariance(returns, window=252, method='sums'):
+    """
+    Daily returns (T, k) --> rolling covariance (T, k, k) of the window ending on each day
+    """
+    return rolling_moments(returns, window, method)[1]
+
+
+def rolling_correlation(returns, window=252, method='sums'):
+    """
+    Daily returns (T, k) --> rolling correlation (T, k, k) of the window ending on each day
+    """
+    cov = rolling_covariance(returns, window, method)
+    vol = np.sqrt(np.diagonal(cov, axis1=1, axis2=2))
+    return cov / (vol[:, :, None] * vol[:, None, :])
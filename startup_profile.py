@@ -0,0 +1,102 @@
+"""
+Cold-start profile of the dashboard.
+
+    python startup_profile.py --out startup_profile.json
+
+Everything runs in fresh interpreters, as on a new worker: first the import
+time of each module the app can load, then one headless render of
+streamlit_app.py (through Streamlit's AppTest) with the time spent in every
+section, lazy imports included. Figures already persisted by the figure cache
+are read back from disk, as a fresh worker would.
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+from instrumentation import INSTRUMENTATION
+
+
+PROFILED_MODULES = [
+    'streamlit', 'numpy', 'pandas', 'plotly.graph_objects', 'plotly.express',
+    'data_access', 'downsampling', 'figure_cache', 'irr_cube', 'custom_plots', 'sweep',
+]
+
+SECTION_TIMES = {}
+
+
+def profile_section(name, render):
+    """
+    Run one app section and record its wall time under name, including the
+    modules it imports on first use. With instrumentation enabled the section's
+    builder calls are recorded under the same name.
+    """
+    start = time.perf_counter()
+    try:
+        with INSTRUMENTATION.section(name):
+            return render()
+    finally:
+        SECTION_TIMES[name] = time.perf_counter() - start
+
+
+def import_time(module):
+    """
+    Seconds to import module in a fresh interpreter, everything it pulls in included.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], capture_output=True, text=True, check=True)
+    # -X importtime lines read "import time: self [us] | cumulative | name"
+    for line in reversed(result.stderr.splitlines()):
+        fields = [field.strip() for field in line.split('|')]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1]) / 1e6
+    return None
+
+
+_RENDER = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+import startup_profile
+app = AppTest.from_file(sys.argv[1], default_timeout=3600)
+app.run()
+print(json.dumps({
+    'seconds': time.perf_counter() - start,
+    'sections': startup_profile.SECTION_TIMES,
+    'exceptions': [str(exception.value) for exception in app.exception],
+}))
+"""
+
+
+def first_render(script='streamlit_app.py'):
+    """
+    One render of script in a fresh interpreter.
+
+    Returns:
+    dict: Total seconds, seconds per section and any exceptions raised.
+    """
+    result = subprocess.run([sys.executable, '-c', _RENDER, script], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--script", default="streamlit_app.py", help="Streamlit script to render")
+    parser.add_argument("--out", help="also write the profile to this JSON file")
+    args = parser.parse_args()
+
+    imports = {}
+    for module in PROFILED_MODULES:
+        imports[module] = import_time(module)
+        print(f"import {module:<28} {imports[module]:8.3f}s")
+
+    render = first_render(args.script)
+    for name, seconds in render['sections'].items():
+        print(f"section {name:<27} {seconds:8.3f}s")
+    print(f"first render {'':<22} {render['seconds']:8.3f}s")
+    for exception in render['exceptions']:
+        print(f"exception: {exception}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({'imports': imports, 'render': render}, f, indent=1)
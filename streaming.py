@@ -0,0 +1,200 @@
+"""
+End-of-day updates: append new daily observations without rebuilding history.
+
+    python streaming.py new_days.csv
+
+The new rows carry the market columns only (RET_*, ER_*, RET_SHORT_* and
+ER_SHORT_* of every asset, the FFR/FXR rates, yields and any other stored
+inputs). Risk parity and tangency weights, portfolio returns and Year are
+derived for those days alone: the rolling mean and covariance state is seeded
+from the last `lookback` stored rows and advanced one day at a time with
+RollingMoments, so the work is O(lookback) however long the history is. The
+finished rows are then appended to the columnar store in place.
+
+Derived series are refreshed at their tail as well: IRR_CUBE.extend carries
+windowed returns over to the longer frame, and refresh_aggregate and
+refresh_period_summary recompute only the buckets new rows can change.
+carry_over applies all three to the caches; the app calls it through
+precompute.reload_if_changed when it picks up appended rows.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from assets import ASSETS
+from columnar_store import COLUMNAR_DATA_PATH, append_columnar, read_manifest, read_tail
+from irr_cube import IRR_CUBE, SERIES_CACHE
+from risk_parity import DXY_LEVERAGE, LONG_ASSETS, SHORT_ASSETS, risk_parity_weights
+from rolling_moments import RollingMoments
+from tangency import max_sharpe_weights
+
+
+def portfolio_columns(df):
+    """
+    Excess returns, the FFR and weights --> returns of the long, short and tangency portfolios
+
+    Weights are held from the next day on, so the first row is NaN.
+
+    Returns:
+    pd.DataFrame: ER_ and RET_ of each portfolio and the two delta columns.
+    """
+    held_long = df[ASSETS.columns('RP_LONG', LONG_ASSETS)].shift(1).to_numpy()
+    held_short = -df[ASSETS.columns('RP_SHORT', SHORT_ASSETS)].shift(1).to_numpy()
+    held_ideal = -df[ASSETS.columns('IDEAL_SHORT', SHORT_ASSETS)].shift(1).to_numpy()
+    er_long = df[ASSETS.columns('ER', LONG_ASSETS)].to_numpy()
+    er_short = df[ASSETS.columns('ER_SHORT', SHORT_ASSETS)].to_numpy()
+
+    portfolios = pd.DataFrame({
+        'ER_RP_Portfolio_LONG': np.einsum('nk,nk->n', held_long, er_long),
+        'ER_RP_Portfolio_SHORT': np.einsum('nk,nk->n', held_short, er_short),
+        'ER_TANGENCY_Portfolio_SHORT': np.einsum('nk,nk->n', held_ideal, er_short),
+    }, index=df.index)
+    for portfolio in ['RP_Portfolio_LONG', 'RP_Portfolio_SHORT', 'TANGENCY_Portfolio_SHORT']:
+        portfolios[f'RET_{portfolio}'] = portfolios[f'ER_{portfolio}'] + df['RET_FFR_d']
+    portfolios['RET_RPLONGSHORT_DELTA'] = portfolios['RET_RP_Portfolio_SHORT'] - portfolios['RET_RP_Portfolio_LONG']
+    portfolios['RET_IDEALSHORT_DELTA'] = portfolios['RET_TANGENCY_Portfolio_SHORT'] - portfolios['RET_RP_Portfolio_LONG']
+    return portfolios
+
+
+def derive_rows(history, rows, lookback=252, dxy_leverage=DXY_LEVERAGE):
+    """
+    Stored tail and new market rows --> the new rows with weights, portfolios and Year
+
+    history holds the last stored rows, all columns; only its last `lookback`
+    rows are read. Weights match risk_parity_frame and tangency_frame over the
+    full history.
+
+    Returns:
+    pd.DataFrame: rows with the derived columns added.
+    """
+    n_assets = len(SHORT_ASSETS)
+    upper = np.ones(n_assets)
+    upper[SHORT_ASSETS.index('DXY')] = 1 / dxy_leverage
+
+    # Rolling state of the window ending on the last stored day...
+    moments = RollingMoments(n_assets, lookback)
+    short_moments = RollingMoments(n_assets, lookback)
+    er_columns, er_short_columns = ASSETS.columns('ER', SHORT_ASSETS), ASSETS.columns('ER_SHORT', SHORT_ASSETS)
+    for er, er_short in zip(history[er_columns].to_numpy()[-lookback:], history[er_short_columns].to_numpy()[-lookback:]):
+        moments.update(er)
+        short_moments.update(er_short)
+
+    # ...advanced one new day at a time
+    cov = np.empty((len(rows), n_assets, n_assets))
+    short_mean = np.empty((len(rows), n_assets))
+    short_cov = np.empty((len(rows), n_assets, n_assets))
+    for t, (er, er_short) in enumerate(zip(rows[er_columns].to_numpy(), rows[er_short_columns].to_numpy())):
+        moments.update(er)
+        short_moments.update(er_short)
+        cov[t] = moments.covariance()
+        short_mean[t] = short_moments.means()
+        short_cov[t] = short_moments.covariance()
+
+    long_weights = risk_parity_weights(cov[:, :len(LONG_ASSETS), :len(LONG_ASSETS)])
+    short_weights = -risk_parity_weights(cov, upper=upper)
+    ideal_weights = -max_sharpe_weights(short_mean, short_cov, upper)
+    derived = rows.assign(
+        **{column: long_weights[:, i] for i, column in enumerate(ASSETS.columns('RP_LONG', LONG_ASSETS))},
+        **{column: short_weights[:, i] for i, column in enumerate(ASSETS.columns('RP_SHORT', SHORT_ASSETS))},
+        **{column: ideal_weights[:, i] for i, column in enumerate(ASSETS.columns('IDEAL_SHORT', SHORT_ASSETS))},
+    )
+
+    # The first new day holds the weights of the last stored day
+    portfolios = portfolio_columns(pd.concat([history.iloc[-1:], derived]))
+    derived = derived.join(portfolios.iloc[len(portfolios) - len(derived):])
+    derived['Year'] = derived.index.year
+    return derived
+
+
+def append_observations(rows, path=COLUMNAR_DATA_PATH, lookback=252, dxy_leverage=DXY_LEVERAGE):
+    """
+    Derive and append new market rows to the columnar store.
+
+    Returns:
+    dict: The store's new manifest.
+    """
+    manifest = read_manifest(path)
+    history = read_tail(path, lookback, manifest)
+    derived = derive_rows(history, rows.sort_index(), lookback, dxy_leverage)
+    return append_columnar(derived[list(manifest['columns'])], path, manifest)
+
+
+def refresh_aggregate(previous, df, lookback_window=252, num_months=1):
+    """
+    aggregate_daily_returns_to_annualized_returns(df) from its result on a shorter prefix of df
+
+    Only previous's last bucket, which the new rows may still fall into, and
+    any later ones are recomputed, from a slice of df long enough for their
+    windowed returns.
+    """
+    from custom_plots import aggregate_daily_returns_to_annualized_returns
+
+    if previous is None or not len(previous):
+        return aggregate_daily_returns_to_annualized_returns(df, lookback_window, num_months)
+
+    step = pd.offsets.MonthEnd(num_months)
+    last_label = previous.index[-1]
+    bucket_start = df.index.searchsorted(last_label - step, side='right')
+
+    # resample lines its buckets up with the first row's month, so the slice
+    # starts in the closing month of an earlier bucket
+    boundary = last_label - step
+    start = df.index.searchsorted(boundary - pd.offsets.MonthEnd(1), side='right')
+    while start > 0 and bucket_start - start < lookback_window - 1:
+        boundary -= step
+        start = df.index.searchsorted(boundary - pd.offsets.MonthEnd(1), side='right')
+
+    tail = aggregate_daily_returns_to_annualized_returns(df.iloc[start:], lookback_window, num_months)
+    return pd.concat([previous.iloc[:-1], tail[tail.index >= last_label]])
+
+
+def refresh_period_summary(previous, df, window_size=256, period='Y'):
+    """
+    custom_plots.portfolio_period_summary(df) from its result on a shorter prefix of df
+
+    Only the current period and any later ones are recomputed.
+    """
+    from custom_plots import portfolio_period_summary
+
+    if previous is None or not len(previous):
+        return portfolio_period_summary(df, window_size, period)
+
+    last_label = previous.index[-1]
+    period_start = pd.Timestamp(year=last_label, month=1, day=1) if period == 'Y' else last_label
+    start = max(df.index.searchsorted(period_start) - (window_size - 1), 0)
+
+    tail = portfolio_period_summary(df.iloc[start:], window_size, period)
+    return pd.concat([previous.iloc[:-1], tail[tail.index >= last_label]])
+
+
+def carry_over(previous, df):
+    """
+    Move the derived series cached for previous over to df, the same rows followed by appended ones
+
+    Windowed returns in the IRR cube are computed for the new rows only, and
+    cached aggregates and period summaries are refreshed at their tail.
+
+    Returns:
+    int: Number of cache entries carried over.
+    """
+    from custom_plots import aggregate_daily_returns_to_annualized_returns, portfolio_period_summary
+
+    carried = IRR_CUBE.extend(previous, df)
+    return carried + SERIES_CACHE.extend(previous, df, {
+        aggregate_daily_returns_to_annualized_returns: refresh_aggregate,
+        portfolio_period_summary: refresh_period_summary,
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="CSV of new market rows, dated in the first column")
+    parser.add_argument("--path", default=COLUMNAR_DATA_PATH, help="columnar store to append to")
+    parser.add_argument("--lookback", type=int, default=252, help="weights lookback in days")
+    args = parser.parse_args()
+
+    rows = pd.read_csv(args.source, index_col=0, parse_dates=True)
+    start = time.perf_counter()
+    manifest = append_observations(rows, args.path, args.lookback)
+    print(f"Appended {len(rows)} rows to {args.path} ({manifest['rows']} rows) in {time.perf_counter() - start:.3f}s")
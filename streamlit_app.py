@@ -1,15 +1,15 @@
-import streamlit as st
-import pandas as pd
-import numpy as np
-import math
-from pathlib import Path
-from window_functions import calculate_windowed_returns, calculate_windowed_annualized_returns
-import plotly.graph_objects as go
-import plotly.express as px
+import os
+import sys
 
+import precompute
+import streamlit as st
+from instrumentation import INSTRUMENTATION
+from precompute import LOOKBACKS, POINTS_OPTIONS, RETURNS_CHARTS, RP_DECADE_PLOT, SWEEP_METRICS, TRADE_WINDOWS
+from startup_profile import profile_section
 
-from custom_plots import create_decade_scatter_plot, create_returns_plot, plot_rolling_excess_returns, plot_yield_comparison, plot_stock_bond_correlation, plot_portfolio_returns_bubble_year
 
+# Heavier modules (pandas, plotly, the builders, the sweep) are imported inside
+# the functions below, so they load when the first section that needs them renders
 
 
 ##CONFIG
@@ -38,16 +38,251 @@ def get_images():
        st.image("https://cdn.prod.website-files.com/634054c00f602044abb3060d/64625fa85ed5193ea3ad5f71_Bitcoin%20Rainbow%20Chart%20.webp", caption="Bitcoin Hyperstition: a very optimistic logistic regression", use_column_width=True)
 
 
-@st.cache_data
-def get_data():
-   df= pd.read_pickle("./Data/processed_data.pkl")
-   return df[df.index.year>1970]
+# Shared references rather than per-call copies: the builders never write to
+# their input and the data layer is copy-on-write
+@st.cache_resource
+def get_data(columns=None):
+   return precompute.page_data(columns)
+
+
+@st.cache_resource
+def get_sweep_results():
+   # Shared with the warmup thread, and read back from disk while the dataset is unchanged
+   return precompute.sweep_results()
+
+
+@st.cache_resource
+def start_precompute():
+   # Once per server process: build the figures of the sections shown inline (every
+   # section with DASHBOARD_LAZY_SECTIONS=0) in the background, so later visitors and
+   # other selectbox options hit the figure cache. Collapsed sections are left to
+   # the reader who opens them, or to a full `python precompute.py` deploy step
+   if os.environ.get("DASHBOARD_PRECOMPUTE") == "0":
+      return None
+   sections = None
+   if os.environ.get("DASHBOARD_LAZY_SECTIONS", "1") != "0":
+      sections = [name for name, lazy in LAZY_SECTIONS.items() if not lazy]
+   return precompute.start_background(sections=sections)
+
+
+@st.cache_resource
+def figure_pool():
+   # Shared by every session, so concurrent visitors queue on the same workers
+   from concurrent.futures import ThreadPoolExecutor
+   return ThreadPoolExecutor(thread_name_prefix='figures')
+
+
+def build_figure(builder, context, args, kwargs):
+   # Runs on a pool worker: cache lookups and builders only, no Streamlit calls.
+   # It records for the run that submitted it, under that run's section
+   from figure_cache import cached_figure
+   with INSTRUMENTATION.worker(context), INSTRUMENTATION.call(builder):
+      return cached_figure(builder, *args, **kwargs)
+
+
+# Figures submitted in async mode, filled in by fill_placeholders() at the end of the run
+pending_figures = []
+
+
+def show_figure(builder, *args, **kwargs):
+   # Figures persist across processes, so a cold start reads them back from disk
+   from figure_cache import FIGURE_CACHE, FIGURE_CACHE_PATH, cached_figure
+   FIGURE_CACHE.path = FIGURE_CACHE_PATH
+   if async_render:
+      placeholder = st.empty()
+      placeholder.caption("Loading chart...")
+      future = figure_pool().submit(build_figure, builder, INSTRUMENTATION.context(), args, kwargs)
+      pending_figures.append((placeholder, future))
+      return
+   with INSTRUMENTATION.call(builder):
+      figure = cached_figure(builder, *args, **kwargs)
+      with INSTRUMENTATION.stage('render'):
+         st.plotly_chart(figure)
+
+
+# Document sections whose charts wait behind an expander until the reader opens it
+LAZY_SECTIONS = {
+   "Overview": False,
+   "Portfolio Construction": True,
+   "Backtest": True,
+}
+
+
+def chart_section(document_section, name, render):
+   # A closed expander skips render entirely, so its data, IRR windows and figures are
+   # never touched; each chart is cached on its own once opened
+   if not (lazy_sections and LAZY_SECTIONS.get(document_section)):
+      return profile_section(name, render)
+   panel = st.expander(name, key=f"show_{name}", on_change="rerun")
+   with panel:
+      if panel.open:
+         return profile_section(name, render)
+
+
+def fill_placeholders():
+   # Each chart appears as soon as its figure is ready, in whatever order they finish
+   from concurrent.futures import as_completed
+   placeholders = {future: placeholder for placeholder, future in pending_figures}
+   for future in as_completed(placeholders):
+      try:
+         placeholders[future].plotly_chart(future.result())
+      except Exception as error:
+         # Shown in place of the chart and counted, so the diagnostics panel surfaces it
+         INSTRUMENTATION.count('figure_failures')
+         placeholders[future].exception(error)
+   pending_figures.clear()
+
+
+def diagnostics_panel():
+   # Hidden unless the page is opened with ?diagnostics=1
+   import pandas as pd
+   summary = INSTRUMENTATION.summary()
+   with st.expander("Diagnostics"):
+      st.text("Section render time (s)")
+      st.dataframe(pd.DataFrame(summary['sections']).T)
+      st.text("Builder calls (s)")
+      builders = pd.DataFrame(summary['builders'])
+      if len(builders):
+         stages = pd.json_normalize(builders.pop('stages_p50').tolist()).add_suffix('_p50')
+         builders = builders.join(stages)
+      st.dataframe(builders)
+      st.text("Cache hits and misses")
+      st.json(summary['counters'])
+      if "data_access" in sys.modules:
+         # The dataset should be opened at most once per render (and once per process)
+         reads = sys.modules["data_access"].disk_reads()
+         st.text(f"Dataset disk reads: {reads} this render, {sys.modules['data_access'].disk_reads(per_render=False)} since start")
+         if reads > 1:
+            st.warning(f"The dataset was read from disk {reads} times in this render")
+      st.download_button("Export JSON", INSTRUMENTATION.to_json(), file_name="diagnostics.json", mime="application/json")
+
+
+def chart_resolution(df, key):
+   # Point budget, decimation method and date span for a long daily chart; Streamlit
+   # does not report browser zooms, so the span is picked here and the figure is
+   # re-decimated from the cached full series
+   import pandas as pd
+   from downsampling import DOWNSAMPLERS
+
+   col1, col2, col3 = st.columns([1, 1, 3])
+   with col1:
+       max_points = st.selectbox("Points per line", POINTS_OPTIONS, format_func=lambda n: "All" if n is None else f"{n:,}", key=f"{key}_points")
+   with col2:
+       method = st.selectbox("Downsampling", list(DOWNSAMPLERS), format_func=str.upper, key=f"{key}_method")
+   with col3:
+       first, last = df.index.min().date(), df.index.max().date()
+       span = st.slider("Dates", min_value=first, max_value=last, value=(first, last), key=f"{key}_span")
+   x_range = None if span == (first, last) else (pd.Timestamp(span[0]), pd.Timestamp(span[1]))
+   return dict(max_points=max_points, x_range=x_range, downsample=method)
+
+
+# Only the selected option of each chart is built; figures come from the figure cache
+def returns_chart(select_col, key):
+   from custom_plots import create_returns_plot
+   df = get_data((select_col,))
+   lookback = st.selectbox("Lookback", LOOKBACKS, format_func=lambda months: f"{months} Month", key=f"{key}_lookback")
+   show_figure(create_returns_plot, df, select_col=select_col, selected_lookback=lookback, **chart_resolution(df, key))
+
+
+##SECTIONS
+def performance_section():
+   from custom_plots import BUBBLE_PERIODS, plot_portfolio_returns_bubble_year
+   df = get_data()
+   bubble_period = st.selectbox("Bubble per", list(BUBBLE_PERIODS), format_func=BUBBLE_PERIODS.get)
+   show_figure(plot_portfolio_returns_bubble_year, df, period=bubble_period)
+
+
+def trade_window_section():
+   from custom_plots import create_decade_scatter_plot
+   irr_period = st.selectbox("Trade window", TRADE_WINDOWS, format_func=lambda months: f"{months} Month(s)")
+   show_figure(create_decade_scatter_plot, SELECTED_IRR_PERIOD=irr_period)
+
+
+def yields_section():
+   from custom_plots import plot_yield_comparison
+   df = get_data(('YIELD_10Y_y', 'YIELD_FFR_y'))
+   show_figure(plot_yield_comparison, df, **chart_resolution(df, 'yields'))
+
+
+def stock_bond_section():
+   from custom_plots import CORRELATION_PERIODS, plot_stock_bond_correlation
+   df = get_data(('RET_SPX_d', 'RET_10Y_d'))
+   correlation_period = st.selectbox("Compound returns per", list(CORRELATION_PERIODS), format_func=lambda period: CORRELATION_PERIODS[period][0])
+   show_figure(plot_stock_bond_correlation, df, period=correlation_period)
+
+
+def asset_returns_section():
+   from custom_plots import ROLLING_WINDOWS, plot_rolling_excess_returns
+   df = get_data(('RET_SPX_d', 'RET_10Y_d', 'RET_DXY_d'))
+   rolling_window = st.selectbox("Rolling window", list(ROLLING_WINDOWS), index=2, format_func=ROLLING_WINDOWS.get)
+   show_figure(plot_rolling_excess_returns, df, selected_window=rolling_window, **chart_resolution(df, 'asset_returns'))
+
+
+def backtest_section():
+   from custom_plots import create_decade_scatter_plot
+
+   st.text("Perf Case Performance")
+   st.markdown("---")
+   returns_chart(RETURNS_CHARTS['tangency'], 'tangency')
+   st.markdown("---")
+
+
+   st.text("Risk Parity Case Performance")
+   st.markdown("---")
+   returns_chart(RETURNS_CHARTS['rp_short'], 'rp_short')
+   st.markdown("---")
+
+
+   st.text("When does the ideal short outperform the long RP?")
+   st.markdown("---")
+   returns_chart(RETURNS_CHARTS['ideal_delta'], 'ideal_delta')
+   st.markdown("---")
+
+
+   st.text("When does the short RP outperform the long RP?")
+   st.markdown("---")
+   returns_chart(RETURNS_CHARTS['rp_delta'], 'rp_delta')
+   st.markdown("---")
 
 
+   st.text("Risk Parity Bubble Plot")
+   st.markdown("---")
+   rp_irr_period = st.selectbox("Trade window", TRADE_WINDOWS, format_func=lambda months: f"{months} Month(s)", key="rp_trade_window")
+   show_figure(create_decade_scatter_plot, SELECTED_IRR_PERIOD=rp_irr_period, **RP_DECADE_PLOT)
 
 
+def sweep_section():
+   from custom_plots import plot_sweep_heatmap
+   from sweep import DEFAULT_GRID
+   sweep_metric = st.selectbox("Metric", SWEEP_METRICS)
+   sweep_holding = st.selectbox("Holding window (months)", DEFAULT_GRID['holding_months'], index=1)
+   st.markdown("---")
+   show_figure(plot_sweep_heatmap, get_sweep_results(), value=sweep_metric, holding_months=sweep_holding)
 
 
+
+
+
+
+show_diagnostics = st.query_params.get("diagnostics") == "1"
+# ?async=1 (or DASHBOARD_ASYNC_RENDER=1) lays the whole page out first and builds
+# the charts concurrently behind placeholders, so text below a slow chart is not held up
+async_render = st.query_params.get("async") == "1" or os.environ.get("DASHBOARD_ASYNC_RENDER") == "1"
+# ?lazy=0 (or DASHBOARD_LAZY_SECTIONS=0) renders every chart inline, as one long page
+lazy_sections = st.query_params.get("lazy", os.environ.get("DASHBOARD_LAZY_SECTIONS", "1")) != "0"
+# Recording is switched on for this session's run only (its script thread and the
+# figures it submits); DASHBOARD_INSTRUMENTATION=1 keeps it on for every run
+INSTRUMENTATION.enable(show_diagnostics)
+
+# The data layer loads with the first chart; on the first render its counter starts at zero
+if "data_access" in sys.modules:
+   sys.modules["data_access"].start_render()
+   # Rows appended by streaming.py since the last run replace the cached frames
+   if precompute.reload_if_changed():
+      get_data.clear()
+      get_sweep_results.clear()
+      start_precompute.clear()
+start_precompute()
 st.title("Short All")
 st.markdown("---")
 
@@ -65,7 +300,8 @@ toc = """
    4. [Risk Parity Weights](#risk-parity-weights)
 3. [**Backtest**](#backtest)
    1. [When did short-all work?](#when-did-short-all-work)
-   2. [Exogenous risks](#exogenous-risks)
+   2. [Parameter Sweep](#parameter-sweep)
+   3. [Exogenous risks](#exogenous-risks)
 4. [**Why did the short-all work?**](#why-did-the-short-all-work)
 5. [**Predictions**](#predictions-for-2024)
 """
@@ -101,9 +337,7 @@ st.write("You can interact with the chart hover over the bubble to see the portf
 
 
 st.markdown("---")
-df = get_data() 
-fig_years = plot_portfolio_returns_bubble_year(df)
-st.plotly_chart(fig_years)
+chart_section("Overview", "Short-All Performance", performance_section)
 st.markdown("---")
 
 
@@ -111,13 +345,9 @@ st.write("Note that in 1974 the short overperformed vs the long, but the compell
 
 
 st.write("For a more granular view of how the trade performed look at the bubble chart below. Select the window of time for which to put on the trade (3 months, 6 months, 12 months)...the portfolio weights are recomputed daily with 1y lookback window so putting on the trade just means expressing a short-all intention. Hover over a specific bubble to get the returns. Notice that as one chooses longer windows the short opportunities go away. A trade will work for 6 months, but the next 12 months of asset prices increases will wipe away the profit.")
-st.write("The chart shows excess annualized excess returns. A 3 month short trade that makes 10% would show up as ~40%. (plz choose a time window from the dropdown if you want the chart to display correctly)")
+st.write("The chart shows excess annualized excess returns. A 3 month short trade that makes 10% would show up as ~40%. (choose a time window from the selector above the chart)")
 st.markdown("---")
-df = get_data()
-
-
-fig_decade = create_decade_scatter_plot()
-st.plotly_chart(fig_decade)
+chart_section("Overview", "Trade Windows", trade_window_section)
 st.markdown("---")
 st.text("")
 
@@ -148,17 +378,13 @@ st.write("Here's summary of the yields. Red sections are where the yields are in
 
 
 st.markdown("---")
-df = get_data() 
-fig_yeild = plot_yield_comparison(df)
-st.plotly_chart(fig_yeild)
+chart_section("Portfolio Construction", "Yields", yields_section)
 st.markdown("---")
 
 
 st.write("We can also get a sense of how stocks and bonds move by looking at the each calendar year")
 st.markdown("---")
-df = get_data() 
-fig_yeild = plot_stock_bond_correlation(df)
-st.plotly_chart(fig_yeild)
+chart_section("Portfolio Construction", "Stock/Bond Returns", stock_bond_section)
 st.markdown("---")
 
 
@@ -225,9 +451,7 @@ Note that it’s very uncommon for all three to be negative. Where they are are
 """)
 st.markdown("##### Asset Returns")
 st.markdown("---")
-df = get_data() 
-fig_er = plot_rolling_excess_returns(df)
-st.plotly_chart(fig_er)
+chart_section("Portfolio Construction", "Asset Returns", asset_returns_section)
 st.markdown("---")
 
 
@@ -302,51 +526,15 @@ st.markdown("##### When did short-all work?")
 st.text("Below are some different visualizations of well the trade worked")
 
 
-st.text("Perf Case Performance")
+chart_section("Backtest", "Backtest", backtest_section)
 st.markdown("---")
-df = get_data() 
-fig_ert = create_returns_plot(df, select_col='ER_TANGENCY_Portfolio_SHORT', lookback_options=[6, 12, 24])
-st.plotly_chart(fig_ert)
-st.markdown("---")
-
 
-st.text("Risk Parity Case Performance")
-st.markdown("---")
-df = get_data() 
-fig_erp = create_returns_plot(df, select_col='ER_RP_Portfolio_SHORT', lookback_options=[6, 12, 24])
-st.plotly_chart(fig_erp)
-st.markdown("---")
 
-
-st.text("When does the ideal short outperform the long RP?")
-st.markdown("---")
-df = get_data() 
-fig_idelta = create_returns_plot(df, select_col='RET_IDEALSHORT_DELTA', lookback_options=[6, 12, 24])
-st.plotly_chart(fig_idelta)
-st.markdown("---")
-
-
-st.text("When does the short RP outperform the long RP?")
-st.markdown("---")
-df = get_data() 
-fig_rpdelta = create_returns_plot(df, select_col='RET_RPLONGSHORT_DELTA', lookback_options=[6, 12, 24])
-st.plotly_chart(fig_rpdelta)
-st.markdown("---")
-
-
-st.text("Risk Parity Bubble Plot")
-st.markdown("---")
-fig_b=create_decade_scatter_plot(
-   PLOT_FREQ_MONTHS=1,
-   COLUMN_TO_PLOT='IRR_ER_RP_Portfolio_SHORT',
-   WEIGHTS_TO_HOVER=['RP_SHORT_SPX','RP_SHORT_10Y','RP_SHORT_DXY'],
-   MARKETS_TO_HOVER=['IRR_ER_SPX_d','IRR_ER_10Y_d','IRR_ER_DXY_d'],
-   START_YEAR=1971,
-   IRR_PERIOD_OPTIONS=[1, 3, 6, 12]  # List of IRR period options in months
-)
-
-
-st.plotly_chart(fig_b)
+# 3.2 Parameter Sweep
+st.text("")
+st.markdown("##### Parameter Sweep")
+st.write("The charts above are one scenario: a 252 day covariance lookback, 5x levered DXY, and fixed holding windows. The heatmap below re-runs the short-all risk parity backtest over a grid of lookbacks and DXY leverage so you can see how sensitive the result is to those choices.")
+chart_section("Backtest", "Parameter Sweep", sweep_section)
 st.markdown("---")
 
 
@@ -471,6 +659,9 @@ Recommendation: against the short-all strategy
 """)
 
 
+if async_render:
+   fill_placeholders()
 
-
-
+if show_diagnostics:
+   diagnostics_panel()
+   INSTRUMENTATION.enable(False)
@@ -0,0 +1,158 @@
+"""
+Parameter sweep of the short-all risk parity backtest.
+
+    python sweep.py --out sweep_results.csv
+
+Every (lookback, dxy_leverage) pair needs its own risk parity weights, so
+pairs are fanned out over a process pool; holding windows and trading-day
+multipliers only change how the resulting daily returns are summarized and
+are evaluated inside each task. Workers read the excess return block from
+shared memory instead of receiving a pickled copy. They are started through a
+forkserver rather than forked, so a multithreaded caller is never forked; as
+with any non-fork start method, the calling script's main module must be safe
+to import (the dashboard runs this CLI in a subprocess for that reason).
+"""
+import argparse
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from assets import ASSETS
+from risk_parity import DXY_LEVERAGE, SHORT_ASSETS, risk_parity_weights
+from rolling_moments import rolling_covariance
+from window_functions import calculate_windowed_returns_block
+
+
+SWEEP_COLUMNS = ASSETS.columns('ER', SHORT_ASSETS) + ASSETS.columns('ER_SHORT', SHORT_ASSETS)
+
+DEFAULT_GRID = {
+    'lookback': [63, 126, 252, 504],
+    'dxy_leverage': [1, 2, 5, 10],
+    'holding_months': [3, 6, 12],
+    'days_per_month': [21, 22, 23],
+}
+
+_shared = {}
+
+
+def _attach(name, shape, dtype):
+    # Runs once per worker: keep the segment open and view it as an array
+    block = shared_memory.SharedMemory(name=name)
+    _shared['memory'] = block
+    _shared['returns'] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def backtest_short_all(returns, lookback=252, dxy_leverage=DXY_LEVERAGE):
+    """
+    ER_* and ER_SHORT_* block (T, 6) --> daily excess returns of the short-all risk parity portfolio
+
+    DXY columns in the block are at the dataset's DXY_LEVERAGE and are rescaled
+    to dxy_leverage. Weights are fixed with the covariance up to the previous
+    day and the DXY weight is capped at 1/dxy_leverage.
+    """
+    n_assets = len(SHORT_ASSETS)
+    scale = np.ones(n_assets)
+    scale[SHORT_ASSETS.index('DXY')] = dxy_leverage / DXY_LEVERAGE
+    long_returns = returns[:, :n_assets] * scale
+    short_returns = returns[:, n_assets:] * scale
+
+    upper = np.ones(n_assets)
+    upper[SHORT_ASSETS.index('DXY')] = 1 / dxy_leverage
+    weights = risk_parity_weights(rolling_covariance(long_returns, lookback), upper=upper)
+
+    portfolio = np.full(len(returns), np.nan)
+    portfolio[1:] = np.einsum('nk,nk->n', weights[:-1], short_returns[1:])
+    return portfolio
+
+
+def _evaluate(lookback, dxy_leverage, holding_months, days_per_month):
+    portfolio = backtest_short_all(_shared['returns'], lookback, dxy_leverage)
+
+    windows = {(months, days): months * days for months in holding_months for days in days_per_month}
+    windowed = calculate_windowed_returns_block(portfolio, sorted(set(windows.values())))
+
+    daily = portfolio[np.isfinite(portfolio)]
+    mean, vol = daily.mean() * 252, daily.std(ddof=1) * np.sqrt(252)
+    wealth = np.cumprod(1 + daily)
+    summary = {
+        'lookback': lookback,
+        'dxy_leverage': dxy_leverage,
+        'annual_er': mean,
+        'annual_vol': vol,
+        'sharpe': mean / vol if vol > 0 else np.nan,
+        'max_drawdown': (wealth / np.maximum.accumulate(wealth)).min() - 1,
+    }
+
+    rows = []
+    for (months, days), window in windows.items():
+        holding = windowed[window][:, 0]
+        holding = holding[np.isfinite(holding)]
+        rows.append({
+            **summary,
+            'holding_months': months,
+            'days_per_month': days,
+            'hit_rate': (holding > 0).mean() if len(holding) else np.nan,
+            'median_holding_return': np.median(holding) if len(holding) else np.nan,
+            'worst_holding_return': holding.min() if len(holding) else np.nan,
+            'best_holding_return': holding.max() if len(holding) else np.nan,
+        })
+    return rows
+
+
+def sweep_block():
+    """
+    ER_* and ER_SHORT_* block (T, 6) of the dataset, from the store's dense asset blocks when it has them.
+    """
+    from data_access import get_block
+    return np.hstack([get_block(ASSETS.columns(kind, SHORT_ASSETS)) for kind in ('ER', 'ER_SHORT')])
+
+
+def run_sweep(df, grid=None, max_workers=None):
+    """
+    Evaluate the short-all backtest over every combination in the grid.
+
+    df is a frame holding SWEEP_COLUMNS or that (T, 6) block itself.
+
+    Returns:
+    pd.DataFrame: One row per (lookback, dxy_leverage, holding_months, days_per_month).
+    """
+    grid = {**DEFAULT_GRID, **(grid or {})}
+    returns = df if isinstance(df, np.ndarray) else df[SWEEP_COLUMNS].to_numpy(dtype=float)
+    returns = np.ascontiguousarray(returns, dtype=float)
+
+    block = shared_memory.SharedMemory(create=True, size=returns.nbytes)
+    try:
+        np.ndarray(returns.shape, dtype=returns.dtype, buffer=block.buf)[:] = returns
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("forkserver"),
+            initializer=_attach,
+            initargs=(block.name, returns.shape, returns.dtype),
+        ) as pool:
+            futures = [
+                pool.submit(_evaluate, lookback, dxy_leverage, grid['holding_months'], grid['days_per_month'])
+                for lookback, dxy_leverage in itertools.product(grid['lookback'], grid['dxy_leverage'])
+            ]
+            rows = [row for future in futures for row in future.result()]
+    finally:
+        block.close()
+        block.unlink()
+
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default="sweep_results.csv", help="CSV (or .pkl pickle) file for the results table")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size")
+    args = parser.parse_args()
+
+    results = run_sweep(sweep_block(), max_workers=args.workers)
+    if args.out.endswith(".pkl"):
+        results.to_pickle(args.out)
+    else:
+        results.to_csv(args.out, index=False)
+    print(f"Wrote {len(results)} scenarios to {args.out}")
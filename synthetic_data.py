@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+from risk_parity import DXY_LEVERAGE, SHORT_ASSETS, risk_parity_frame
+from streaming import portfolio_columns
+from tangency import tangency_frame
+
+
+def _periods_per_year(index):
+    step = (index[-1] - index[0]) / max(len(index) - 1, 1)
+    if step >= pd.Timedelta(hours=23):
+        return 252
+    # Intraday: spread each trading day over the observations that fall in it
+    return 252 * pd.Timedelta(days=1) / step
+
+
+def _ar1(shocks, phi):
+    """
+    x_t = phi * x_{t-1} + shocks_t for every column at once, as an FFT convolution
+    of the shocks with the kernel phi^k instead of a Python loop over time.
+    """
+    n_rows = len(shocks)
+    size = 1 << int(np.ceil(np.log2(2 * n_rows)))
+    kernel = phi ** np.arange(n_rows)
+    return np.fft.irfft(np.fft.rfft(shocks, size, axis=0) * np.fft.rfft(kernel, size)[:, None], size, axis=0)[:n_rows]
+
+
+def _modified_duration(yield_decimal, maturity_years=10):
+    return (1 - (1 + yield_decimal / 2) ** (-2 * maturity_years)) / yield_decimal
+
+
+def generate_market_data(n_rows, start='1970-01-01', freq='B', extra_assets=0, seed=0, dxy_leverage=DXY_LEVERAGE, lookback=252):
+    """
+    Simulated frame with the processed_data schema, for load and stress testing.
+
+    Rates (FFR, 10Y, foreign) are mean-reverting; SPX, 10Y and DXY shocks are
+    correlated Student-t draws scaled by a persistent log-volatility process.
+    Returns, excess returns, short legs, risk parity and tangency weights and
+    the portfolio columns are then derived the same way the processed dataset
+    defines them. `extra_assets` adds factor-correlated RET_/ER_ columns named
+    X1, X2, ... Any pandas frequency works; intraday frames scale the daily
+    drift and volatility down to the observation step.
+
+    Returns:
+    pd.DataFrame: Simulated dataset on a DatetimeIndex.
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=n_rows, freq=freq)
+    periods = _periods_per_year(index)
+    step = 252 / periods
+
+    # Fat-tailed, correlated shocks with clustered volatility (SPX, 10Y yield in %, DXY)
+    correlation = np.array([[1.0, -0.2, 0.1], [-0.2, 1.0, 0.15], [0.1, 0.15, 1.0]])
+    t_draws = rng.standard_t(5, (n_rows, 3)) / np.sqrt(5 / 3)
+    shocks = t_draws @ np.linalg.cholesky(correlation).T
+    log_vol = _ar1(rng.standard_normal((n_rows, 3)) * 0.1 * np.sqrt(step), 1 - 0.01 * step)
+    vol = np.array([0.01, 0.06, 0.005]) * np.sqrt(step) * np.exp(log_vol - log_vol.var(axis=0) / 2)
+    innovations = shocks * vol
+
+    # Rates in percent: FFR and the foreign rate mean-revert on their own; the
+    # 10Y term spread over FFR mean-reverts on the correlated yield shocks
+    rate_paths = _ar1(rng.standard_normal((n_rows, 2)) * np.array([0.06, 0.05]) * np.sqrt(step), 1 - 0.002 * step)
+    term_spread = _ar1(innovations[:, 1:2], 1 - 0.002 * step)[:, 0]
+    yield_ffr = np.abs(4.0 + rate_paths[:, 0])
+    yield_fx = np.abs(3.0 + rate_paths[:, 1])
+    yield_10y = np.abs(yield_ffr + 1.5 + term_spread)
+
+    ret_ffr = yield_ffr / 100 / periods
+    ret_fxr = yield_fx / 100 / periods
+
+    # SPX adds a 3% dividend yield; the 10Y earns its yield minus duration times the yield change
+    ret_spx = (0.07 + 0.03) / periods + innovations[:, 0]
+    previous_yield = np.concatenate([yield_10y[:1], yield_10y[:-1]]) / 100
+    ret_10y = -_modified_duration(previous_yield) * (yield_10y / 100 - previous_yield) + previous_yield / periods
+
+    # Levered DXY: price move plus the US-foreign rate carry, funded at FFR
+    ret_dxy = dxy_leverage * (innovations[:, 2] + ret_ffr - ret_fxr) + ret_ffr
+
+    df = pd.DataFrame({
+        'RET_SPX_d': ret_spx,
+        'RET_10Y_d': ret_10y,
+        'RET_DXY_d': ret_dxy,
+        'RET_FFR_d': ret_ffr,
+        'RET_FXR_d': ret_fxr,
+    }, index=index)
+
+    # Extra assets load on the SPX shock plus their own noise
+    for i in range(1, extra_assets + 1):
+        beta = rng.uniform(-0.5, 1.5)
+        idio = rng.uniform(0.005, 0.02) * np.sqrt(step)
+        df[f'RET_X{i}_d'] = rng.uniform(0, 0.08) / periods + beta * innovations[:, 0] + idio * rng.standard_t(5, n_rows) / np.sqrt(5 / 3)
+
+    assets = SHORT_ASSETS + [f'X{i}' for i in range(1, extra_assets + 1)]
+    for asset in assets:
+        df[f'ER_{asset}_d'] = df[f'RET_{asset}_d'] - ret_ffr
+        df[f'ER_SHORT_{asset}_d'] = -df[f'ER_{asset}_d'] if asset == 'DXY' else -df[f'RET_{asset}_d']
+        df[f'RET_SHORT_{asset}_d'] = df[f'ER_SHORT_{asset}_d'] + ret_ffr
+
+    # Weights from the in-project engines, applied from the next day on
+    weights = risk_parity_frame(df, lookback, dxy_leverage)
+    ideal = tangency_frame(df, lookback, dxy_leverage)
+    df = df.join(weights).join(ideal)
+    df = df.join(portfolio_columns(df))
+
+    df['YIELD_10Y_y'] = yield_10y
+    df['YIELD_FFR_y'] = yield_ffr
+    df['Year'] = df.index.year
+    return df
@@ -0,0 +1,137 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+from risk_parity import DXY_LEVERAGE, SHORT_ASSETS
+from rolling_moments import rolling_moments_windows
+
+
+def _face_candidate(mean, cov, status, upper):
+    """
+    Max-Sharpe point of one face of the capped simplex for a batch of windows.
+
+    status[i] is 'free', 'lower' (weight 0) or 'upper' (weight at its cap). On
+    the face the weights are v = v0 + N z with 1'v = 1; the stationary point of
+    (a + b'z) / sqrt(c + 2d'z + z'Ez) is z = lam * E^-1 b - E^-1 d with
+    lam = (c - d'E^-1 d) / (a - b'E^-1 d), so every face is solved in closed form.
+    """
+    n_rows, n_assets = mean.shape
+    free = [i for i in range(n_assets) if status[i] == 'free']
+    fixed = np.array([upper[i] if status[i] == 'upper' else 0.0 for i in range(n_assets)])
+
+    budget = 1 - fixed.sum()
+    if not free or budget < 0:
+        return None
+    v0 = fixed.copy()
+    v0[free] = budget / len(free)
+    v = np.broadcast_to(v0, (n_rows, n_assets)).copy()
+
+    if len(free) > 1:
+        # Directions e_j - e_last keep the budget on the free assets fixed
+        basis = np.zeros((n_assets, len(free) - 1))
+        for j, i in enumerate(free[:-1]):
+            basis[i, j] = 1
+            basis[free[-1], j] = -1
+
+        a = mean @ v0
+        b = mean @ basis
+        cov_v0 = cov @ v0
+        c = cov_v0 @ v0
+        d = cov_v0 @ basis
+        e = basis.T @ cov @ basis
+
+        try:
+            e_inv = np.linalg.inv(e)
+        except np.linalg.LinAlgError:
+            e_inv = np.linalg.pinv(e)
+        p = np.einsum('nij,nj->ni', e_inv, b)
+        r = np.einsum('nij,nj->ni', e_inv, d)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            lam = (c - np.einsum('nj,nj->n', d, r)) / (a - np.einsum('nj,nj->n', b, r))
+        v = v + (lam[:, None] * p - r) @ basis.T
+
+    feasible = ((v >= -1e-10) & (v <= upper + 1e-10)).all(axis=1) & np.isfinite(v).all(axis=1)
+    return np.where(feasible[:, None], v, np.nan)
+
+
+def max_sharpe_weights(mean, cov, upper=None):
+    """
+    Mean (T, k) and covariance (T, k, k) --> long-only max-Sharpe weights (T, k)
+
+    Weights lie in [0, upper] and sum to 1. The optimum lies on some face of
+    that polytope, so every face is solved in closed form for all windows at
+    once and the feasible candidate with the best Sharpe ratio is kept.
+    """
+    mean = np.asarray(mean, dtype=float)
+    cov = np.asarray(cov, dtype=float)
+    n_rows, n_assets = mean.shape
+    upper = np.ones(n_assets) if upper is None else np.minimum(np.asarray(upper, dtype=float), 1)
+
+    weights = np.full((n_rows, n_assets), np.nan)
+    valid = np.isfinite(mean).all(axis=1) & np.isfinite(cov).all(axis=(1, 2))
+    if not valid.any():
+        return weights
+    mean, cov = mean[valid], cov[valid]
+
+    best = np.full(len(mean), -np.inf)
+    best_weights = np.full((len(mean), n_assets), np.nan)
+    states = [('free', 'lower', 'upper') if cap < 1 else ('free', 'lower') for cap in upper]
+    for status in itertools.product(*states):
+        v = _face_candidate(mean, cov, status, upper)
+        if v is None:
+            continue
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpe = np.einsum('nk,nk->n', mean, v) / np.sqrt(np.einsum('nk,nkj,nj->n', v, cov, v))
+        better = np.nan_to_num(sharpe, nan=-np.inf) > best
+        best = np.where(better, sharpe, best)
+        best_weights[better] = v[better]
+
+    weights[valid] = best_weights
+    return weights
+
+
+def tangency_frame(df, window=252, dxy_leverage=DXY_LEVERAGE, days=None):
+    """
+    Daily short excess returns --> IDEAL_SHORT_* weights
+
+    For each day, the fixed short weights in [-1, 0] (summing to -1, with
+    |w_dxy| <= 1/dxy_leverage) that maximized the Sharpe ratio of the
+    ER_SHORT_*_d returns over the `window` days ending on that day. These are
+    the perfect-information weights for that window. `days` limits the solve to
+    those index labels.
+    """
+    return tangency_frames(df, [window], dxy_leverage, days)[window]
+
+
+def tangency_frames(df, windows, dxy_leverage=DXY_LEVERAGE, days=None):
+    """
+    tangency_frame for several windows sharing one pass of rolling mean/covariance aggregates.
+
+    Returns:
+    dict: window -> pd.DataFrame of IDEAL_SHORT_* weights.
+    """
+    returns = df[[f'ER_SHORT_{asset}_d' for asset in SHORT_ASSETS]]
+    rows = np.arange(len(df)) if days is None else df.index.get_indexer(days)
+    upper = [1, 1, 1 / dxy_leverage]
+
+    frames = {}
+    for window, (mean, cov) in rolling_moments_windows(returns, windows).items():
+        weights = -max_sharpe_weights(mean[rows], cov[rows], upper)
+        frames[window] = pd.DataFrame(
+            {f'IDEAL_SHORT_{asset}': weights[:, i] for i, asset in enumerate(SHORT_ASSETS)},
+            index=df.index[rows],
+        )
+    return frames
+
+
+def tangency_by_period(df, period_options=(1, 3, 6, 12), trading_days_per_month=22, dxy_leverage=DXY_LEVERAGE):
+    """
+    Perfect-information short weights at every month end for each period option (in months).
+
+    Returns:
+    dict: period in months -> pd.DataFrame of IDEAL_SHORT_* weights at month ends.
+    """
+    month_ends = df.index.to_series().groupby(df.index.to_period('M')).max()
+    windows = {period: trading_days_per_month * period for period in period_options}
+    frames = tangency_frames(df, sorted(set(windows.values())), dxy_leverage, days=month_ends.values)
+    return {period: frames[window] for period, window in windows.items()}
@@ -0,0 +1,26 @@
+import benchmarks
+from irr_cube import DERIVED_CACHES
+from synthetic_data import generate_market_data
+
+
+def test_repeats_start_from_cold_caches(monkeypatch):
+    # Each run's hits and misses, read as the builder returns
+    runs = []
+
+    def record(builder):
+        def run(df):
+            result = builder(df)
+            runs.append([(cache.hits, cache.misses) for cache in DERIVED_CACHES])
+            return result
+        return run
+
+    df = generate_market_data(3000, seed=1)
+    for name in ['create_decade_scatter_plot', 'plot_portfolio_returns_bubble_year']:
+        runs.clear()
+        monkeypatch.setitem(benchmarks.BUILDERS, name, record(benchmarks.BUILDERS[name]))
+        benchmarks.benchmark_builder(name, df, repeat=3)
+
+        # Three timed runs and the traced one, none helped by the one before
+        assert len(runs) == 4
+        assert all(run == runs[0] for run in runs)
+        assert any(misses for _, misses in runs[0])
@@ -0,0 +1,26 @@
+import os
+
+import pytest
+
+from columnar_store import atomic_write
+
+
+def test_atomic_write_replaces_the_file(tmp_path):
+    path = str(tmp_path / "status.json")
+    atomic_write(path, '{"old": 1}')
+    atomic_write(path, '{"new": 2}')
+    atomic_write(str(tmp_path / "results.pkl"), b"\x80\x05")
+
+    assert open(path).read() == '{"new": 2}'
+    assert open(tmp_path / "results.pkl", "rb").read() == b"\x80\x05"
+    assert sorted(os.listdir(tmp_path)) == ["results.pkl", "status.json"]
+
+
+def test_failed_write_keeps_the_old_file(tmp_path):
+    path = str(tmp_path / "manifest.json")
+    atomic_write(path, "old")
+    with pytest.raises(TypeError):
+        atomic_write(path, 42)
+
+    assert open(path).read() == "old"
+    assert os.listdir(tmp_path) == ["manifest.json"]
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from custom_plots import create_decade_scatter_plot, plot_rolling_excess_returns
+from synthetic_data import generate_market_data
+
+
+@pytest.fixture(scope="module")
+def df():
+    return generate_market_data(2000, seed=4)
+
+
+def test_decade_scatter_keeps_positional_arguments(df):
+    # PLOT_FREQ_MONTHS is still the first parameter; df comes last as a keyword
+    figure = create_decade_scatter_plot(3, SELECTED_IRR_PERIOD=1, df=df)
+    default = create_decade_scatter_plot(SELECTED_IRR_PERIOD=1, df=df)
+    assert len(figure.data[0].x) < len(default.data[0].x)
+
+
+def test_rolling_returns_accept_deprecated_dxy_leverage(df):
+    default = plot_rolling_excess_returns(df, selected_window=252)
+    with pytest.warns(DeprecationWarning):
+        levered = plot_rolling_excess_returns(df, DXY_LEVERAGE=1, selected_window=252)
+
+    traces = {trace.name: trace for trace in default.data}
+    for trace in levered.data:
+        expected = np.asarray(traces[trace.name].y, dtype=float)
+        if 'DXY' in trace.name:
+            assert not np.allclose(np.asarray(trace.y, dtype=float), expected, equal_nan=True)
+        else:
+            np.testing.assert_allclose(np.asarray(trace.y, dtype=float), expected, equal_nan=True)
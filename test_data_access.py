@@ -0,0 +1,18 @@
+import numpy as np
+
+import data_access
+import precompute
+from columnar_store import write_columnar
+from synthetic_data import generate_market_data
+
+
+def test_page_frame_shares_memory_with_the_store(data_dir):
+    full = generate_market_data(600, seed=2)
+    write_columnar(full)
+
+    df = precompute.page_data(['RET_SPX_d', 'Year'])
+    assert df.index[0].year == 1971 and (df.index.year > 1970).all()
+    assert len(df) == (full.index.year > 1970).sum()
+
+    store = data_access.get_dataset(['RET_SPX_d'])
+    assert np.shares_memory(df['RET_SPX_d'].to_numpy(), store['RET_SPX_d'].to_numpy())
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from downsampling import DOWNSAMPLERS, downsample_frame, downsample_indices
+
+
+@pytest.fixture
+def walk():
+    rng = np.random.default_rng(0)
+    return np.arange(5000, dtype=float), rng.normal(size=5000).cumsum()
+
+
+@pytest.mark.parametrize("method", sorted(DOWNSAMPLERS))
+def test_endpoints_kept_within_budget(walk, method):
+    x, y = walk
+    for n_rows in [10, 11, 101, 5000]:
+        for max_points in [2, 3, 4, 5, 10, 11, 57, 500]:
+            selected = DOWNSAMPLERS[method](x[:n_rows], y[:n_rows], max_points)
+            assert len(selected) <= max_points or len(selected) == n_rows
+            assert selected[0] == 0 and selected[-1] == n_rows - 1
+            assert (np.diff(selected) > 0).all()
+
+
+@pytest.mark.parametrize("method", sorted(DOWNSAMPLERS))
+def test_short_series_kept_whole(walk, method):
+    x, y = walk
+    np.testing.assert_array_equal(DOWNSAMPLERS[method](x[:50], y[:50], 50), np.arange(50))
+
+
+def test_minmax_keeps_the_extremes(walk):
+    x, y = walk
+    selected = DOWNSAMPLERS['minmax'](x, y, 200)
+    assert y.argmin() in selected and y.argmax() in selected
+
+
+def test_frame_columns_share_positions_and_skip_nan(walk):
+    x, y = walk
+    frame = pd.DataFrame({'a': y, 'b': -y}, index=pd.bdate_range('1970-01-01', periods=len(y)))
+    frame.iloc[:100, 1] = np.nan
+
+    selected = downsample_indices(frame.index, frame.to_numpy(), 400, 'lttb')
+    assert len(selected) <= 400
+    assert {0, 100, len(frame) - 1} <= set(selected)
+
+    thinned = downsample_frame(frame, 400, 'lttb')
+    pd.testing.assert_frame_equal(thinned, frame.iloc[selected])
+    pd.testing.assert_frame_equal(downsample_frame(frame, 400, x_range=('1980-01-01', '1980-03-31')), frame.loc['1980-01-01':'1980-03-31'])
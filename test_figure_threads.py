@@ -0,0 +1,18 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from custom_plots import BUBBLE_PERIODS, create_decade_scatter_plot, plot_portfolio_returns_bubble_year
+from synthetic_data import generate_market_data
+
+
+def test_builders_run_concurrently():
+    # The async page and the precompute warmup build figures on shared thread pools
+    df = generate_market_data(3000, seed=1)
+    bubbles = [dict(period=period) for period in BUBBLE_PERIODS]
+    serial = [plot_portfolio_returns_bubble_year(df, **kwargs).to_json() for kwargs in bubbles]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        threaded = list(pool.map(lambda kwargs: plot_portfolio_returns_bubble_year(df, **kwargs).to_json(), bubbles * 4))
+        scatters = list(pool.map(lambda months: create_decade_scatter_plot(SELECTED_IRR_PERIOD=months, df=df), [1, 3, 6, 12] * 2))
+
+    assert threaded == serial * 4
+    assert all(len(figure.data) for figure in scatters)
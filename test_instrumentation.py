@@ -0,0 +1,67 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import Instrumentation
+
+
+def test_enable_is_per_thread_and_passed_to_workers():
+    instrumentation = Instrumentation()
+    recording = threading.Event()
+    counted = threading.Event()
+
+    def diagnostics_run():
+        instrumentation.enable()
+        with instrumentation.section('Overview'):
+            instrumentation.count('diagnostics')
+            context = instrumentation.context()
+        recording.set()
+        counted.wait()
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            pool.submit(work, context).result()
+        instrumentation.enable(False)
+
+    def work(context):
+        with instrumentation.worker(context):
+            instrumentation.count('worker')
+
+    def other_run():
+        # Runs while the diagnostics run is recording
+        recording.wait()
+        instrumentation.count('other')
+        counted.set()
+
+    threads = [threading.Thread(target=diagnostics_run), threading.Thread(target=other_run)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert instrumentation.counters == {'diagnostics': 1, 'worker': 1}
+    assert not instrumentation.enabled
+
+
+def test_worker_records_under_the_submitting_section():
+    instrumentation = Instrumentation()
+    instrumentation.enable()
+    with instrumentation.section('Backtest'):
+        context = instrumentation.context()
+
+    def build():
+        with instrumentation.worker(context), instrumentation.call(build):
+            instrumentation.count('built')
+        return instrumentation.enabled
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        still_enabled = pool.submit(build).result()
+
+    assert not still_enabled
+    [builder] = instrumentation.summary()['builders']
+    assert builder['section'] == 'Backtest'
+
+
+def test_always_enabled_records_everywhere():
+    instrumentation = Instrumentation(enabled=True)
+    thread = threading.Thread(target=instrumentation.count, args=('anywhere',))
+    thread.start()
+    thread.join()
+    assert instrumentation.counters == {'anywhere': 1}
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from irr_cube import IRRCube
+
+
+def returns_frame(n_rows, n_columns):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(rng.normal(0.0003, 0.01, (n_rows, n_columns)), columns=[f'RET_{i}_d' for i in range(n_columns)],
+                        index=pd.bdate_range('1990-01-01', periods=n_rows))
+
+
+def test_many_assets_stay_cached():
+    # 100 assets x 4 windows is well past a few hundred entries but small in bytes
+    df = returns_frame(2000, 100)
+    cube = IRRCube()
+    cube.get(df, df.columns, [22, 66, 132, 264])
+    cube.get(df, df.columns, [22, 66, 132, 264])
+    assert cube.hits == cube.misses == 400
+
+
+def test_evicts_least_recently_used_bytes():
+    df = returns_frame(1000, 4)
+    entry_bytes = len(df) * 8
+    cube = IRRCube(max_bytes=6 * entry_bytes)
+    cube.get(df, df.columns, [22])
+    cube.get(df, df.columns[:2], [66])
+    cube.get(df, df.columns[:1], [22])
+    cube.get(df, df.columns[2:], [66])
+
+    assert cube._bytes == sum(values.nbytes for values in cube._entries.values()) <= cube.max_bytes
+    # RET_0_d at 22 was used again, so RET_1_d and RET_2_d at 22 went first
+    assert [key[1:] for key in cube._entries] == [('RET_3_d', 22), ('RET_0_d', 66), ('RET_1_d', 66),
+                                                  ('RET_0_d', 22), ('RET_2_d', 66), ('RET_3_d', 66)]
@@ -0,0 +1,54 @@
+import numpy as np
+
+from risk_parity import risk_parity_weights
+
+
+def random_covariances(n_rows, n_assets, seed=0):
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(size=(n_rows, n_assets, n_assets + 2))
+    vols = rng.uniform(0.005, 0.03, (n_rows, n_assets))
+    cov = np.einsum('nik,njk->nij', factors, factors) / (n_assets + 2)
+    return cov * vols[:, :, None] * vols[:, None, :]
+
+
+def risk_contributions(weights, cov):
+    return weights * np.einsum('nij,nj->ni', cov, weights)
+
+
+def assert_equal_among(contributions, free):
+    for row, mask in zip(contributions, free):
+        np.testing.assert_allclose(row[mask], row[mask].mean(), rtol=1e-6)
+
+
+def test_unconstrained_weights_have_equal_risk_contributions():
+    cov = random_covariances(50, 4)
+    weights = risk_parity_weights(cov)
+
+    assert (weights > 0).all()
+    np.testing.assert_allclose(weights.sum(axis=1), 1, atol=1e-12)
+    assert_equal_among(risk_contributions(weights, cov), np.ones_like(weights, dtype=bool))
+
+
+def test_capped_assets_sit_at_their_cap():
+    cov = random_covariances(50, 4, seed=1)
+    # The last asset is the least volatile, so risk parity would overweight it
+    cov[:, 3, :] *= 0.1
+    cov[:, :, 3] *= 0.1
+    upper = np.array([1.0, 1.0, 1.0, 0.1])
+    weights = risk_parity_weights(cov, upper=upper)
+
+    assert (weights >= 0).all() and (weights <= upper + 1e-12).all()
+    np.testing.assert_allclose(weights.sum(axis=1), 1, atol=1e-12)
+    np.testing.assert_allclose(weights[:, 3], 0.1, atol=1e-12)
+
+    # The remaining budget is split with equal risk contributions among the free assets
+    assert_equal_among(risk_contributions(weights, cov), np.tile(upper > 0.1, (len(cov), 1)))
+
+
+def test_rows_with_missing_covariance_are_nan():
+    cov = random_covariances(3, 3)
+    cov[1, 0, 0] = np.nan
+    weights = risk_parity_weights(cov)
+
+    assert np.isnan(weights[1]).all()
+    assert np.isfinite(weights[[0, 2]]).all()
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rolling_moments import RollingMoments, rolling_covariance, rolling_moments
+
+
+@pytest.fixture
+def returns():
+    rng = np.random.default_rng(0)
+    returns = pd.DataFrame(rng.normal(0.0004, 0.01, (400, 3)) @ np.array([[1, 0.3, 0], [0, 1, -0.2], [0, 0, 1]]))
+    # A missing day makes every window holding it NaN
+    returns.iloc[150] = np.nan
+    return returns
+
+
+def pandas_covariance(returns, window):
+    return returns.rolling(window).cov().to_numpy().reshape(len(returns), returns.shape[1], returns.shape[1])
+
+
+@pytest.mark.parametrize("method", ['sums', 'welford'])
+@pytest.mark.parametrize("window", [2, 60, 252])
+def test_covariance_matches_pandas(returns, method, window):
+    cov = rolling_covariance(returns, window, method)
+    expected = pandas_covariance(returns, window)
+
+    np.testing.assert_array_equal(np.isnan(cov), np.isnan(expected))
+    np.testing.assert_allclose(cov, expected, rtol=1e-9, atol=1e-15, equal_nan=True)
+
+
+@pytest.mark.parametrize("method", ['sums', 'welford'])
+def test_mean_matches_pandas(returns, method):
+    mean, _ = rolling_moments(returns, 60, method)
+    np.testing.assert_allclose(mean, returns.rolling(60).mean().to_numpy(), rtol=1e-9, atol=1e-15, equal_nan=True)
+
+
+def test_streaming_state_matches_last_window(returns):
+    moments = RollingMoments(returns.shape[1], 60)
+    for row in returns.to_numpy():
+        moments.update(row)
+
+    np.testing.assert_allclose(moments.covariance(), pandas_covariance(returns, 60)[-1], rtol=1e-9)
+    np.testing.assert_allclose(moments.means(), returns.iloc[-60:].mean().to_numpy(), rtol=1e-9)
+
+
+def test_unknown_method_raises(returns):
+    with pytest.raises(ValueError):
+        rolling_covariance(returns, 60, method='naive')
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+import data_access
+import precompute
+from assets import ASSETS
+from columnar_store import read_columns, write_columnar
+from custom_plots import aggregate_daily_returns_to_annualized_returns, portfolio_period_summary
+from irr_cube import IRR_CUBE, SERIES_CACHE, get_series, get_windowed_returns
+from streaming import append_observations, derive_rows, refresh_aggregate, refresh_period_summary
+from synthetic_data import generate_market_data
+
+LOOKBACK = 252
+N_ROWS = 2600
+N_NEW = 30
+
+
+@pytest.fixture(scope="module")
+def full():
+    return generate_market_data(N_ROWS, seed=3, lookback=LOOKBACK)
+
+
+def market_columns(df):
+    derived = set(ASSETS.columns('RP_LONG') + ASSETS.columns('RP_SHORT') + ASSETS.columns('IDEAL_SHORT'))
+    return [column for column in df.columns if column not in derived
+            and not column.startswith(('ER_RP_', 'RET_RP_', 'ER_TANGENCY_', 'RET_TANGENCY_')) and not column.endswith('_DELTA') and column != 'Year']
+
+
+def assert_frames_close(result, expected):
+    assert list(result.columns) == list(expected.columns)
+    assert result.index.equals(expected.index)
+    np.testing.assert_allclose(result.to_numpy(dtype=float), expected.to_numpy(dtype=float), rtol=0, atol=1e-10, equal_nan=True)
+
+
+def test_derive_rows_matches_full_build(full):
+    history, rows = full.iloc[:-N_NEW], full.iloc[-N_NEW:]
+    derived = derive_rows(history, rows[market_columns(full)], LOOKBACK)
+    assert_frames_close(derived[list(full.columns)], rows)
+
+
+def test_append_observations_matches_full_write(full, tmp_path):
+    path = str(tmp_path / "store")
+    write_columnar(full.iloc[:-N_NEW], path)
+    manifest = append_observations(full.iloc[-N_NEW:][market_columns(full)], path, LOOKBACK)
+
+    assert manifest['rows'] == len(full)
+    assert_frames_close(read_columns(path, list(full.columns)), full)
+
+
+@pytest.mark.parametrize("lookback_window, num_months", [(22, 1), (66, 3), (264, 1)])
+def test_refresh_aggregate_matches_full_compute(full, lookback_window, num_months):
+    previous = aggregate_daily_returns_to_annualized_returns(full.iloc[:-N_NEW], lookback_window, num_months)
+    refreshed = refresh_aggregate(previous, full, lookback_window, num_months)
+    assert_frames_close(refreshed, aggregate_daily_returns_to_annualized_returns(full, lookback_window, num_months))
+
+
+@pytest.mark.parametrize("period", ['Y', 'Q', 'M'])
+def test_refresh_period_summary_matches_full_compute(full, period):
+    previous = portfolio_period_summary(full.iloc[:-N_NEW], 256, period)
+    refreshed = refresh_period_summary(previous, full, 256, period)
+    assert_frames_close(refreshed, portfolio_period_summary(full, 256, period))
+
+
+def test_irr_cube_extend_matches_fresh_compute(full):
+    previous, df = full.iloc[:-N_NEW].copy(), full.copy()
+    columns, windows = ASSETS.columns('RET')[:3], [22, 252]
+    get_windowed_returns(previous, columns, windows)
+
+    assert IRR_CUBE.extend(previous, df) >= len(columns) * len(windows)
+    extended = get_windowed_returns(df, columns, windows)
+    IRR_CUBE.clear()
+    fresh = get_windowed_returns(df, columns, windows)
+    for window in windows:
+        assert_frames_close(extended[window], fresh[window])
+
+
+def test_reload_carries_series_over_to_appended_rows(full, data_dir):
+    write_columnar(full.iloc[:-N_NEW])
+    previous = precompute.page_data()
+    get_series(portfolio_period_summary, previous, 256, 'Y')
+    get_series(aggregate_daily_returns_to_annualized_returns, previous, 22, 1)
+
+    append_observations(full.iloc[-N_NEW:][market_columns(full)], lookback=LOOKBACK)
+    assert precompute.reload_if_changed()
+    df = precompute.page_data()
+    assert len(df) == len(previous) + N_NEW
+
+    # Carried over at reload rather than recomputed on the next read
+    for function, args in [(portfolio_period_summary, (256, 'Y')), (aggregate_daily_returns_to_annualized_returns, (22, 1))]:
+        assert (data_access.dataset_fingerprint(df), function, args) in SERIES_CACHE._entries
+        assert_frames_close(get_series(function, df, *args), function(df, *args))
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from tangency import max_sharpe_weights
+
+
+def sharpe(mean, cov, weights):
+    return weights @ mean / np.sqrt(weights @ cov @ weights)
+
+
+def grid(upper, step=0.005):
+    # Every weight vector on the capped simplex, at the given resolution
+    ticks = np.arange(0, 1 + step / 2, step)
+    w0, w1 = np.meshgrid(ticks, ticks, indexing='ij')
+    points = np.column_stack([w0.ravel(), w1.ravel(), 1 - w0.ravel() - w1.ravel()])
+    return points[((points >= -1e-12) & (points <= upper + 1e-12)).all(axis=1)]
+
+
+def windows(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    mean = rng.normal(0.0003, 0.0004, (n_rows, 3))
+    factors = rng.normal(size=(n_rows, 3, 5))
+    vols = rng.uniform(0.005, 0.02, (n_rows, 3))
+    cov = np.einsum('nik,njk->nij', factors, factors) / 5 * vols[:, :, None] * vols[:, None, :]
+    return mean, cov
+
+
+@pytest.mark.parametrize("upper", [None, np.array([1.0, 1.0, 0.3])])
+def test_weights_beat_a_grid_search(upper):
+    mean, cov = windows(40)
+    weights = max_sharpe_weights(mean, cov, upper)
+    caps = np.ones(3) if upper is None else upper
+    points = grid(caps)
+
+    for m, c, w in zip(mean, cov, weights):
+        assert (w >= -1e-10).all() and (w <= caps + 1e-10).all()
+        np.testing.assert_allclose(w.sum(), 1, atol=1e-10)
+        grid_sharpe = (points @ m) / np.sqrt(np.einsum('pk,kj,pj->p', points, c, points))
+        assert sharpe(m, c, w) >= grid_sharpe.max() - 1e-9
+
+
+def test_windows_with_missing_moments_are_nan():
+    mean, cov = windows(3)
+    mean[1, 0] = np.nan
+    weights = max_sharpe_weights(mean, cov)
+
+    assert np.isnan(weights[1]).all()
+    assert np.isfinite(weights[[0, 2]]).all()
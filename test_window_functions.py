@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from window_functions import calculate_windowed_annualized_returns, calculate_windowed_returns, calculate_windowed_returns_block
+
+
+@pytest.fixture
+def block():
+    rng = np.random.default_rng(0)
+    block = pd.DataFrame(rng.normal(0.0003, 0.01, (600, 3)), columns=['A', 'B', 'C'],
+                         index=pd.bdate_range('1990-01-01', periods=600))
+    # Leading NaNs of different lengths, as for assets that start trading later
+    block.iloc[:40, 1] = np.nan
+    block.iloc[:300, 2] = np.nan
+    return block
+
+
+@pytest.mark.parametrize("annualize", [False, True])
+def test_block_matches_rolling_per_column(block, annualize):
+    windows = [1, 22, 252, 600, 700]
+    windowed = calculate_windowed_returns_block(block, windows, annualize=annualize)
+    reference = calculate_windowed_annualized_returns if annualize else calculate_windowed_returns
+
+    for window in windows:
+        expected = block.apply(lambda column: reference(column, window))
+        assert windowed[window].index.equals(block.index)
+        assert list(windowed[window].columns) == list(block.columns)
+        np.testing.assert_array_equal(windowed[window].isna().to_numpy(), expected.isna().to_numpy())
+        np.testing.assert_allclose(windowed[window].to_numpy(), expected.to_numpy(), rtol=1e-12, atol=1e-14, equal_nan=True)
+
+
+def test_block_keeps_input_type(block):
+    series = calculate_windowed_returns_block(block['B'], [22])[22]
+    assert isinstance(series, pd.Series) and series.name == 'B'
+    pd.testing.assert_series_equal(series, calculate_windowed_returns(block['B'], 22), rtol=1e-12)
+
+    array = calculate_windowed_returns_block(block['B'].to_numpy(), [22])[22]
+    assert isinstance(array, np.ndarray) and array.shape == (len(block), 1)
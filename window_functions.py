@@ -34,3 +34,62 @@ def calculate_windowed_annualized_returns(pct_series, window=252):
 
     return annual_return
 
+
+
+def calculate_windowed_returns_block(pct_block, windows, annualize=False):
+    """
+    Daily Returns Pct (columns) --> Decimal Returns % for several windows at once
+
+    log1p and the cumulative sum are computed once for the whole block; every
+    window is then a differenced slice of that cumulative sum. A window that
+    contains a NaN is NaN, matching rolling(window).sum().
+
+    Returns:
+    dict: window -> pd.DataFrame (np.ndarray for array input) of returns over that window.
+    """
+    values = np.asarray(pct_block, dtype=float)
+    if values.ndim == 1:
+        values = values[:, None]
+    n_rows, n_cols = values.shape
+
+    # One log1p and one cumulative sum shared by all windows
+    log_returns = np.log1p(values)
+    missing = np.isnan(log_returns)
+    cumulative_log_returns = np.zeros((n_rows + 1, n_cols))
+    np.cumsum(np.where(missing, 0.0, log_returns), axis=0, out=cumulative_log_returns[1:])
+    cumulative_missing = np.zeros((n_rows + 1, n_cols), dtype=np.int64)
+    np.cumsum(missing, axis=0, out=cumulative_missing[1:])
+
+    windowed = {}
+    for window in windows:
+        pct_return = np.full((n_rows, n_cols), np.nan)
+        if 0 < window <= n_rows:
+            window_sum = cumulative_log_returns[window:] - cumulative_log_returns[:-window]
+            window_sum[cumulative_missing[window:] - cumulative_missing[:-window] > 0] = np.nan
+            pct_return[window - 1:] = np.expm1(window_sum)
+        if annualize:
+            pct_return *= 252 / window
+
+        if isinstance(pct_block, pd.DataFrame):
+            pct_return = pd.DataFrame(pct_return, index=pct_block.index, columns=pct_block.columns)
+        elif isinstance(pct_block, pd.Series):
+            pct_return = pd.Series(pct_return[:, 0], index=pct_block.index, name=pct_block.name)
+        windowed[window] = pct_return
+
+    return windowed
+
+
+def calculate_period_returns(pct_block, period='Y'):
+    """
+    Daily Returns Pct (columns) --> Decimal Returns % compounded over each calendar period
+
+    period is 'Y' (indexed by year), 'Q' or 'M' (indexed by pd.Period). The
+    compounding is expm1 of the grouped log1p sum, so the groupby runs a
+    built-in sum rather than a Python function per group. NaN days are
+    skipped, as in (1 + x).prod() - 1.
+
+    Returns:
+    pd.DataFrame (pd.Series for Series input): Returns for each period.
+    """
+    keys = pct_block.index.year if period == 'Y' else pct_block.index.to_period(period)
+    return np.expm1(np.log1p(pct_block).groupby(keys).sum())